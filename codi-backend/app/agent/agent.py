@@ -12,6 +12,7 @@ Replaces the complex multi-agent orchestration with simplicity.
 import asyncio
 import json
 import re
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -23,6 +24,7 @@ from langchain_core.messages import (
     HumanMessage,
     SystemMessage,
     ToolMessage,
+    message_chunk_to_message,
 )
 from langchain_google_genai import ChatGoogleGenerativeAI
 
@@ -219,6 +221,41 @@ Based on the conversation history and changes made, create a concise markdown wa
 - List the specific files that were modified
 - Include any commands the user needs to run"""
 
+# Maximum characters of LLM content included in per-iteration log lines
+LOG_PREVIEW_CHARS = 200
+
+# Streamed response text is sent once this many seconds have passed since
+# the last send, or once this many characters are pending, whichever is first
+RESPONSE_DELTA_INTERVAL = 0.05
+RESPONSE_DELTA_MAX_CHARS = 200
+
+
+def _preview_content(content: Any) -> str:
+    """Build a bounded log preview of an LLM message's content.
+    
+    Multimodal replies carry a list of content parts; their text is joined
+    as for _content_text(), skipping non-text parts, then truncated.
+    """
+    if not isinstance(content, (str, list)):
+        return ""
+    return _content_text(content)[:LOG_PREVIEW_CHARS]
+
+
+def _content_text(content: Any) -> str:
+    """Flatten an LLM message's content into plain text.
+    
+    List content is joined from its non-empty text parts.
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = [
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        ]
+        return " ".join([part for part in parts if part])
+    return str(content)
+
 
 class CodingAgent:
     """Simple coding agent with ReAct loop.
@@ -498,6 +535,66 @@ class CodingAgent:
         except Exception as e:
             logger.warning(f"Failed to broadcast tool result: {e}")
     
+    async def _stream_llm_response(self, llm_with_tools: Any) -> AIMessage:
+        """Stream one LLM turn, broadcasting its text as it is generated.
+        
+        Chunks are merged into a single message, so tool calls come out in
+        the same shape as from ainvoke(). Text deltas are batched by time
+        and size and sent as agent_response_delta events; the frontend shows
+        them provisionally until the final response or a terminal status
+        replaces them.
+        
+        Args:
+            llm_with_tools: LLM with the current tool schemas bound
+            
+        Returns:
+            The aggregated chunks as a plain AI message
+        """
+        response = None
+        pending: List[str] = []
+        pending_chars = 0
+        # The first delta goes out at once; later ones are batched
+        last_sent = float("-inf")
+        
+        async def send_pending() -> None:
+            nonlocal pending_chars, last_sent
+            text = "".join(pending)
+            pending.clear()
+            pending_chars = 0
+            last_sent = time.monotonic()
+            try:
+                await self.connection_manager.broadcast_to_project(
+                    self.context.project_id,
+                    {
+                        "type": "agent_response_delta",
+                        "agent": "codi",
+                        "text": text,
+                    },
+                )
+            except Exception as e:
+                logger.warning(f"Failed to broadcast response delta: {e}")
+        
+        async for chunk in llm_with_tools.astream(self.messages):
+            response = chunk if response is None else response + chunk
+            
+            delta = _content_text(chunk.content)
+            if not delta:
+                continue
+            pending.append(delta)
+            pending_chars += len(delta)
+            if (
+                pending_chars >= RESPONSE_DELTA_MAX_CHARS
+                or time.monotonic() - last_sent >= RESPONSE_DELTA_INTERVAL
+            ):
+                await send_pending()
+        
+        if pending:
+            await send_pending()
+        
+        if response is None:
+            raise ValueError("LLM returned an empty response")
+        return message_chunk_to_message(response)
+    
     async def _generate_status_message(self, context_type: str, context: str = "") -> str:
         """Generate a brief, professional status message via LLM.
         
@@ -623,11 +720,13 @@ Rules:
         iteration = 0
         max_planning_iterations = 20  # Limit planning iterations
         
+        # Tool schemas don't change between iterations, so bind once
+        llm_with_tools = self.llm.bind_tools(tool_schemas)
+        
         while iteration < max_planning_iterations:
             iteration += 1
             
             try:
-                llm_with_tools = self.llm.bind_tools(tool_schemas)
                 response = await llm_with_tools.ainvoke(messages)
                 messages.append(response)
                 
@@ -635,15 +734,7 @@ Rules:
                 
                 if not tool_calls:
                     # Planning complete - extract the plan
-                    if isinstance(response.content, str):
-                        plan_content = response.content
-                    elif isinstance(response.content, list):
-                        plan_content = " ".join(
-                            part.get("text", "") if isinstance(part, dict) else str(part)
-                            for part in response.content
-                        )
-                    else:
-                        plan_content = str(response.content)
+                    plan_content = _content_text(response.content)
                     break
                 
                 # Execute read-only tools
@@ -1011,12 +1102,13 @@ Generate a brief walkthrough of what was accomplished."""
                 logger.warning(f"Failed to load knowledge packs: {e}")
                 # Continue with base prompt
         
-        # Load relevant memories if session_id is present
+        # Load relevant memories if session_id is present. They depend on the
+        # current message, so they ride on the new user turn rather than the
+        # system prompt: system prompt + chat history then stay a byte-identical
+        # prefix across a session's runs, which Gemini's implicit caching reuses.
         memory_context = ""
         if self.context.session_id:
             memory_context = await self._load_memories(user_message)
-            if memory_context:
-                system_prompt = f"{system_prompt}\n\n{memory_context}"
         
         # Load previous chat history if session_id is present
         chat_history = []
@@ -1031,7 +1123,10 @@ Generate a brief walkthrough of what was accomplished."""
             self.messages.extend(chat_history)
         
         # Add the current user message
-        self.messages.append(HumanMessage(content=user_message))
+        if memory_context:
+            self.messages.append(HumanMessage(content=f"{memory_context}\n\n{user_message}"))
+        else:
+            self.messages.append(HumanMessage(content=user_message))
         
         # Extract and store important information from user message to Mem0
         # This is critical for remembering facts like user's name, preferences, etc.
@@ -1120,19 +1215,19 @@ Generate a brief walkthrough of what was accomplished."""
 
         # Convert tools to LangChain format
         tool_schemas = self._convert_tools_to_langchain_format(current_tools)
+        llm_with_tools = self.llm.bind_tools(tool_schemas)
         
         while iteration < self.max_iterations:
             iteration += 1
             logger.debug(f"ReAct iteration {iteration}")
             
             try:
-                # Call LLM with tools
-                llm_with_tools = self.llm.bind_tools(tool_schemas)
+                # Call LLM with tools, streaming its text to the frontend
+                response = await self._stream_llm_response(llm_with_tools)
                 
-                response = await llm_with_tools.ainvoke(self.messages)
-                
-                logger.info(f"LLM Response Raw: {response}")
-                logger.info(f"LLM Content: {response.content}")
+                if settings.debug:
+                    logger.debug(f"LLM Response Raw: {response}")
+                logger.info(f"LLM Content: {_preview_content(response.content)}")
                 logger.info(f"LLM Tool Calls: {getattr(response, 'tool_calls', 'N/A')}")
                 
                 # Add response to conversation
@@ -1143,16 +1238,7 @@ Generate a brief walkthrough of what was accomplished."""
                 
                 if not tool_calls:
                     # No tool calls - agent is done, extract final response
-                    if isinstance(response.content, str):
-                        final_response = response.content
-                    elif isinstance(response.content, list):
-                        # Join text parts
-                        final_response = " ".join(
-                            part.get("text", "") if isinstance(part, dict) else str(part)
-                            for part in response.content
-                        )
-                    else:
-                        final_response = str(response.content)
+                    final_response = _content_text(response.content)
                     
                     logger.info(f"Agent completed after {iteration} iterations")
                     break
@@ -4,18 +4,29 @@ Uses Google's Gemini 2.5 Computer Use API with Python Playwright
 for AI-driven browser automation. Replaces the previous LangChain + Node.js architecture.
 """
 import asyncio
-import base64
+import binascii
 import os
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from google import genai
 from google.genai import types
 from google.genai.types import Content, Part
 from playwright.async_api import async_playwright, Browser, Page, BrowserContext
 
+try:
+    # SIMD base64 codec; returns str directly without a bytes->str copy
+    from pybase64 import b64decode as _b64decode
+    from pybase64 import b64encode_as_string as _b64encode
+except ImportError:  # Fall back to the stdlib codec
+    from binascii import a2b_base64 as _b64decode
+    
+    def _b64encode(data: bytes) -> str:
+        return binascii.b2a_base64(data, newline=False).decode("ascii")
+
 from app.core.config import settings
 from app.utils.logging import get_logger
+from app.utils.serialization import utc_isoformat
 
 logger = get_logger(__name__)
 
@@ -26,6 +37,66 @@ SCREEN_HEIGHT = 900
 # Model name for Computer Use
 COMPUTER_USE_MODEL = "gemini-2.5-computer-use-preview-10-2025"
 
+# Upper bound (milliseconds) on a single Gemini request, so a stalled
+# connection fails the iteration instead of hanging the agent loop
+GEMINI_REQUEST_TIMEOUT_MS = 120_000
+
+# Target interval between streamed browser frames (~30 FPS)
+STREAM_FRAME_INTERVAL = 0.033
+
+# JPEG quality for frames streamed to the frontend
+STREAM_JPEG_QUALITY = 60
+
+# Qualities the polling fallback steps between (a CDP screencast encodes
+# frames in the browser at STREAM_JPEG_QUALITY): it drops a level while the
+# smoothed capture time exceeds STREAM_SLOW_CAPTURE seconds and climbs back
+# once captures take under half that
+STREAM_JPEG_QUALITY_LEVELS = (30, 45, STREAM_JPEG_QUALITY)
+STREAM_SLOW_CAPTURE = 0.025
+
+# Interval between streamed frames while the model is generating a turn;
+# the agent isn't acting on the page then, so full-rate capture is wasted
+STREAM_IDLE_INTERVAL = 1.0
+
+# How far (seconds) the polling stream may fall behind its frame schedule
+# before it resyncs rather than capturing back to back to catch up
+STREAM_MAX_LAG = 0.1
+
+# Seconds to wait for cancelled stream tasks to finish unwinding
+STREAM_CANCEL_TIMEOUT = 1.0
+
+# Upper bound (seconds) on each teardown step in close(), so an unresponsive
+# browser process cannot stall session cleanup
+CLOSE_STEP_TIMEOUT = 5.0
+
+# Default number of most recent screenshot-bearing turns whose images are sent
+# to the model; older screenshots are dropped from the history before each call
+MAX_RECENT_SCREENSHOT_TURNS = 2
+
+# Default number of turns kept after the initial task turn; older turns are
+# dropped from the history before each call
+MAX_HISTORY_TURNS = 20
+
+# Text left in place of a screenshot dropped from the history
+OMITTED_SCREENSHOT_TEXT = "[Previous screenshot omitted]"
+
+# Sent instead of a screenshot identical to the previous one the model saw
+UNCHANGED_SCREENSHOT_TEXT = "Unchanged since the previous screenshot"
+
+# Scroll directions, as constant sets for O(1) membership checks
+_POSITIVE_SCROLL_DIRECTIONS = frozenset({"down", "right"})
+_VERTICAL_SCROLL_DIRECTIONS = frozenset({"up", "down"})
+
+# Actions that can start a navigation or form submission; only these wait for
+# the page's load state afterwards. The rest just get a short paint delay.
+_NAV_ACTIONS = frozenset({
+    "navigate", "click_at", "type_text_at", "key_combination", "go_back", "go_forward",
+})
+
+# Minimum settle delay (seconds) after navigation-capable and other actions
+NAV_SETTLE_DELAY = 0.5
+INPUT_SETTLE_DELAY = 0.1
+
 
 SYSTEM_PROMPT = """You are operating a desktop web browser controlled via Playwright.
 
@@ -61,20 +132,134 @@ Error handling:
 - If an element fails to load, retry logically before giving up.
 """
 
+# Sent when the agent runs out of iterations, asking for a summary instead
+MAX_ITERATIONS_SUMMARY_PROMPT = (
+    "You have reached the maximum number of defined steps (max_iterations). "
+    "Please provide a clear and concise summary of what you have found, "
+    "accomplished, or verified so far based on our interaction. "
+    "If you have partial results, please list them."
+)
+
+# Generation config with the Computer Use tool. It never changes between
+# runs, so it is built once at import instead of on every run().
+COMPUTER_USE_CONFIG = types.GenerateContentConfig(
+    system_instruction=SYSTEM_PROMPT,
+    tools=[
+        types.Tool(
+            computer_use=types.ComputerUse(
+                environment=types.Environment.ENVIRONMENT_BROWSER
+            )
+        )
+    ],
+    # Enable thinking for better reasoning
+    thinking_config=types.ThinkingConfig(include_thoughts=True),
+)
+
+
+
 
 
 
 
+def _is_mouse_move(event: Dict) -> bool:
+    """Check whether an interaction event is a plain pointer move."""
+    return event.get("type") == "input_mouse" and event.get("eventType") == "mouseMoved"
 
 
 def denormalize_x(x: int, screen_width: int = SCREEN_WIDTH) -> int:
     """Convert normalized x coordinate (0-1000) to actual pixel coordinate."""
-    return int(x / 1000 * screen_width)
+    return int(x * screen_width // 1000)
 
 
 def denormalize_y(y: int, screen_height: int = SCREEN_HEIGHT) -> int:
     """Convert normalized y coordinate (0-1000) to actual pixel coordinate."""
-    return int(y / 1000 * screen_height)
+    return int(y * screen_height // 1000)
+
+
+def _append_streamed_part(parts: List[Part], part: Part) -> None:
+    """Append a streamed part, merging a text fragment into the previous one.
+    
+    Parts carrying a function call or a thought signature are kept as-is.
+    """
+    if parts and part.text and not part.function_call and not part.thought_signature:
+        last = parts[-1]
+        if (
+            last.text is not None
+            and not last.function_call
+            and not last.thought_signature
+            and bool(last.thought) == bool(part.thought)
+        ):
+            last.text += part.text
+            return
+    parts.append(part)
+
+
+# Process-wide Playwright driver. Starting it spawns a Node.js process, so it
+# is started once and shared; each agent still launches its own browser.
+_playwright = None
+_playwright_lock = asyncio.Lock()
+
+
+async def get_playwright():
+    """Get or start the shared Playwright driver."""
+    global _playwright
+    async with _playwright_lock:
+        if _playwright is None:
+            _playwright = await async_playwright().start()
+    return _playwright
+
+
+async def restart_playwright(stale: Any) -> Any:
+    """Replace a shared Playwright driver that stopped working.
+    
+    Only the given instance is replaced, so agents that hit the same dead
+    driver at once restart it a single time between them.
+    
+    Args:
+        stale: The driver instance that failed
+    
+    Returns:
+        A working shared driver
+    """
+    global _playwright
+    async with _playwright_lock:
+        if _playwright is stale:
+            try:
+                await stale.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping playwright: {e}")
+            _playwright = await async_playwright().start()
+        return _playwright
+
+
+async def shutdown_playwright() -> None:
+    """Stop the shared Playwright driver (application shutdown)."""
+    global _playwright
+    async with _playwright_lock:
+        if _playwright is not None:
+            try:
+                await _playwright.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping playwright: {e}")
+            _playwright = None
+
+
+# Process-wide Gemini client, shared by all agents so they reuse one
+# HTTP connection pool instead of opening a new one per session
+_gemini_client: Optional[genai.Client] = None
+
+
+def get_gemini_client() -> genai.Client:
+    """Get or create the shared Gemini client."""
+    global _gemini_client
+    if _gemini_client is None:
+        # Use GEMINI_API_KEY or GOOGLE_API_KEY
+        api_key = settings.gemini_api_key or os.environ.get("GOOGLE_API_KEY", "")
+        _gemini_client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(timeout=GEMINI_REQUEST_TIMEOUT_MS),
+        )
+    return _gemini_client
 
 
 class ComputerUseAgent:
@@ -88,12 +273,31 @@ class ComputerUseAgent:
     5. Repeat until task complete
     """
     
+    # Computer Use action name -> handler method name, resolved once per action
+    _ACTION_HANDLERS: Dict[str, str] = {
+        "open_web_browser": "_action_open_web_browser",
+        "navigate": "_action_navigate",
+        "click_at": "_action_click_at",
+        "hover_at": "_action_hover_at",
+        "type_text_at": "_action_type_text_at",
+        "key_combination": "_action_key_combination",
+        "scroll_document": "_action_scroll_document",
+        "scroll_at": "_action_scroll_at",
+        "go_back": "_action_go_back",
+        "go_forward": "_action_go_forward",
+        "wait_5_seconds": "_action_wait_5_seconds",
+        "search": "_action_search",
+        "drag_and_drop": "_action_drag_and_drop",
+    }
+    
     def __init__(
         self,
         project_id: int,
         user_id: int,
         max_iterations: int = 30,
         headless: bool = True,
+        max_recent_screenshots: int = MAX_RECENT_SCREENSHOT_TURNS,
+        max_history_turns: int = MAX_HISTORY_TURNS,
     ) -> None:
         """Initialize the Computer Use agent.
         
@@ -102,11 +306,17 @@ class ComputerUseAgent:
             user_id: User ID
             max_iterations: Maximum agent loop iterations
             headless: Run browser in headless mode
+            max_recent_screenshots: Number of most recent screenshot turns
+                whose images are kept in the model history
+            max_history_turns: Number of turns kept in the model history
+                after the initial task turn
         """
         self.project_id = project_id
         self.user_id = user_id
         self.max_iterations = max_iterations
         self.headless = headless
+        self.max_recent_screenshots = max_recent_screenshots
+        self.max_history_turns = max_history_turns
         
         # Playwright instances
         self._playwright = None
@@ -114,9 +324,6 @@ class ComputerUseAgent:
         self._context: Optional[BrowserContext] = None
         self._page: Optional[Page] = None
         
-        # Gemini client
-        self._client = None
-        
         # Connection manager for WebSocket broadcasting
         self._connection_manager = None
         
@@ -129,17 +336,23 @@ class ComputerUseAgent:
         # Stop flag for graceful termination
         self._stop_requested = False
         
-        # Background streaming task
+        # Background streaming tasks: capture loop + frame flusher
         self._stream_task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Single-slot frame buffer: the capture loop overwrites it, the flusher
+        # broadcasts whatever is newest, so superseded frames are dropped
+        self._latest_frame: Optional[Union[bytes, str]] = None
+        self._frame_event = asyncio.Event()
+        
+        # Cleared while the model is generating, throttling the capture loop
+        self._model_idle = asyncio.Event()
+        self._model_idle.set()
     
     @property
     def client(self) -> genai.Client:
-        """Get Gemini client (lazy initialization)."""
-        if self._client is None:
-            # Use GEMINI_API_KEY or GOOGLE_API_KEY
-            api_key = settings.gemini_api_key or os.environ.get("GOOGLE_API_KEY", "")
-            self._client = genai.Client(api_key=api_key)
-        return self._client
+        """Get Gemini client (shared across agents, created lazily)."""
+        return get_gemini_client()
     
     @property
     def connection_manager(self):
@@ -150,57 +363,150 @@ class ComputerUseAgent:
         return self._connection_manager
     
     async def _start_streaming(self) -> None:
-        """Start background streaming task."""
+        """Start background streaming tasks."""
         if self._stream_task and not self._stream_task.done():
             return
             
         self._stream_task = asyncio.create_task(self._stream_loop())
+        self._flush_task = asyncio.create_task(self._flush_frames())
         logger.info("Started background browser stream")
 
     async def _stop_streaming(self) -> None:
-        """Stop background streaming task."""
+        """Stop background streaming tasks."""
         if self._stream_task:
-            self._stream_task.cancel()
-            try:
-                await self._stream_task
-            except asyncio.CancelledError:
-                pass
+            tasks = {task for task in (self._stream_task, self._flush_task) if task}
+            for task in tasks:
+                task.cancel()
+            # Bounded join so a task stuck in a screenshot cannot hang shutdown
+            _, pending = await asyncio.wait(tasks, timeout=STREAM_CANCEL_TIMEOUT)
+            if pending:
+                logger.warning("Browser stream tasks did not finish after cancel")
             self._stream_task = None
+            self._flush_task = None
+            self._latest_frame = None
             logger.info("Stopped background browser stream")
 
     async def _stream_loop(self) -> None:
-        """Continuous background streaming loop for smooth frontend."""
+        """Continuous background streaming loop for smooth frontend.
+        
+        Prefers a CDP screencast, where Chromium pushes a frame only when the
+        page repaints; falls back to polling screenshots if no CDP session
+        can be opened.
+        """
         logger.info("Entering background stream loop")
+        try:
+            cdp = await self._context.new_cdp_session(self._page)
+        except Exception as e:
+            logger.info(f"CDP screencast unavailable, polling screenshots: {e}")
+            await self._poll_frames()
+            return
+        
+        await self._screencast(cdp)
+    
+    async def _screencast(self, cdp: Any) -> None:
+        """Stream frames pushed by CDP Page.startScreencast until cancelled.
+        
+        Each frame is acked right away so the browser can encode the next
+        one; the flusher still coalesces whatever arrives between sends and
+        applies the idle rate while the model is generating. A screenshot is
+        pushed first, since a static page sends nothing until it repaints.
+        
+        Args:
+            cdp: CDP session attached to the page
+        """
         frame_count = 0
         
+        async def on_frame(params: Dict[str, Any]) -> None:
+            nonlocal frame_count
+            try:
+                await cdp.send("Page.screencastFrameAck", {"sessionId": params["sessionId"]})
+                # Kept as CDP's base64 until the send path knows its encoding
+                self._latest_frame = params["data"]
+                self._frame_event.set()
+                
+                if frame_count % 30 == 0:
+                    await self._broadcast("browser_url_changed", {"url": self._page.url}, timestamp=False)
+                frame_count += 1
+            except Exception as e:
+                logger.debug(f"Screencast frame error: {e}")
+        
+        cdp.on("Page.screencastFrame", on_frame)
+        try:
+            try:
+                self._latest_frame = await self._get_screenshot(
+                    format="jpeg", quality=STREAM_JPEG_QUALITY
+                )
+                self._frame_event.set()
+            except Exception as e:
+                logger.debug(f"Initial stream frame error: {e}")
+            
+            await cdp.send("Page.startScreencast", {
+                "format": "jpeg",
+                "quality": STREAM_JPEG_QUALITY,
+                "maxWidth": SCREEN_WIDTH,
+                "maxHeight": SCREEN_HEIGHT,
+            })
+            logger.info("Started CDP screencast")
+            
+            # Frames arrive through on_frame until the task is cancelled
+            await asyncio.Event().wait()
+        finally:
+            try:
+                async with asyncio.timeout(STREAM_CANCEL_TIMEOUT):
+                    await cdp.send("Page.stopScreencast")
+                    await cdp.detach()
+            except Exception as e:
+                logger.debug(f"Error stopping screencast: {e}")
+    
+    async def _poll_frames(self) -> None:
+        """Capture screenshots in a loop at ~30 FPS, adapting JPEG quality."""
+        frame_count = 0
+        level = len(STREAM_JPEG_QUALITY_LEVELS) - 1
+        capture_ema = 0.0
+        next_deadline = time.perf_counter()
+        
         try:
             while not self._stop_requested and self._page:
                 try:
-                    start_time = datetime.utcnow()
+                    # While the model is thinking, capture at the idle rate
+                    # and resume full rate as soon as its turn arrives
+                    if not self._model_idle.is_set():
+                        try:
+                            async with asyncio.timeout(STREAM_IDLE_INTERVAL):
+                                await self._model_idle.wait()
+                        except TimeoutError:
+                            pass
                     
-                    # Capture JPEG for Frontend (Fast)
-                    screenshot_bytes = await self._get_screenshot(format="jpeg", quality=60)
-                    screenshot_b64 = base64.b64encode(screenshot_bytes).decode('utf-8')
+                    start_time = time.perf_counter()
                     
-                    # Broadcast frame
-                    await self._broadcast("browser_frame", {
-                        "image": screenshot_b64, 
-                        "format": "jpeg",
-                        "deviceWidth": SCREEN_WIDTH,
-                        "deviceHeight": SCREEN_HEIGHT
-                    })
+                    # Capture JPEG for Frontend (Fast) and hand it to the flusher
+                    self._latest_frame = await self._get_screenshot(
+                        format="jpeg", quality=STREAM_JPEG_QUALITY_LEVELS[level]
+                    )
+                    self._frame_event.set()
+                    capture_ema = 0.8 * capture_ema + 0.2 * (time.perf_counter() - start_time)
                     
                     # Periodically sync URL (every ~10 frames or so, or just rely on navigation events)
                     # Doing it every frame is fine if it's cheap, but page.url is cheap.
                     if frame_count % 30 == 0:
-                         await self._broadcast("browser_url_changed", {"url": self._page.url})
+                         await self._broadcast("browser_url_changed", {"url": self._page.url}, timestamp=False)
+                         
+                         # Re-evaluate quality at the same cadence so it can't oscillate
+                         if capture_ema > STREAM_SLOW_CAPTURE and level > 0:
+                             level -= 1
+                         elif capture_ema < STREAM_SLOW_CAPTURE / 2 and level < len(STREAM_JPEG_QUALITY_LEVELS) - 1:
+                             level += 1
                     
                     frame_count += 1
                     
-                    # Maintain ~30 FPS
-                    elapsed = (datetime.utcnow() - start_time).total_seconds()
-                    sleep_time = max(0.001, 0.033 - elapsed)
-                    await asyncio.sleep(sleep_time)
+                    # Maintain ~30 FPS against a fixed deadline so per-frame
+                    # overruns don't accumulate as drift; after a long stall
+                    # (or an idle wait) resync instead of bursting to catch up
+                    next_deadline += STREAM_FRAME_INTERVAL
+                    sleep_time = next_deadline - time.perf_counter()
+                    if sleep_time < -STREAM_MAX_LAG:
+                        next_deadline = time.perf_counter()
+                    await asyncio.sleep(max(0.0, sleep_time))
                     
                 except Exception as e:
                     # Don't crash the agent, just log and retry
@@ -211,41 +517,106 @@ class ComputerUseAgent:
         except Exception as e:
             logger.error(f"Stream loop died: {e}")
     
-    async def _broadcast(self, message_type: str, data: Dict) -> None:
-        """Broadcast message via WebSocket."""
+    async def _flush_frames(self) -> None:
+        """Broadcast the newest captured frame at most once per frame interval.
+        
+        Decouples capture from WebSocket delivery: a slow send never stalls the
+        capture loop, and frames captured while a send is in flight are
+        coalesced into the latest one instead of queueing up. While the model
+        is generating a turn, frames go out at most once per
+        STREAM_IDLE_INTERVAL, whichever way they were captured.
+        """
+        try:
+            while True:
+                await self._frame_event.wait()
+                self._frame_event.clear()
+                
+                frame = self._latest_frame
+                self._latest_frame = None
+                if frame is None:
+                    continue
+                
+                await self._broadcast_frame(frame)
+                if self._model_idle.is_set():
+                    await asyncio.sleep(STREAM_FRAME_INTERVAL)
+                    continue
+                
+                # Resume full rate as soon as the model's turn arrives
+                try:
+                    async with asyncio.timeout(STREAM_IDLE_INTERVAL):
+                        await self._model_idle.wait()
+                except TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Frame flusher died: {e}")
+    
+    async def _broadcast(self, message_type: str, data: Dict, timestamp: bool = True) -> None:
+        """Broadcast message via WebSocket.
+        
+        Args:
+            message_type: Message "type" field
+            data: Message fields
+            timestamp: Stamp the message; high-rate stream messages the
+                frontend never displays skip it (the Redis path still adds one)
+        """
+        message = {"type": message_type, "agent": "browser", **data}
+        if timestamp:
+            message["timestamp"] = utc_isoformat()
+        
         try:
             if self.connection_manager.get_connection_count(self.project_id) > 0:
-                await self.connection_manager.send_to_local_connections(
-                    self.project_id,
-                    {
-                        "type": message_type,
-                        "agent": "browser",
-                        **data,
-                        "timestamp": datetime.utcnow().isoformat(),
-                    }
-                )
+                await self.connection_manager.send_to_local_connections(self.project_id, message)
             else:
-                await self.connection_manager.broadcast_to_project(
-                    self.project_id,
-                    {
-                        "type": message_type,
-                        "agent": "browser",
-                        **data,
-                        "timestamp": datetime.utcnow().isoformat(),
-                    },
-                )
+                await self.connection_manager.broadcast_to_project(self.project_id, message)
         except Exception as e:
             logger.warning(f"Failed to broadcast: {e}")
     
+    async def _broadcast_frame(self, frame: Union[bytes, str], format: str = "jpeg") -> None:
+        """Send a captured frame to the frontend.
+        
+        Local connections get a binary message carrying the raw image bytes;
+        only the Redis fallback path pays for base64-in-JSON.
+        
+        Args:
+            frame: Raw image bytes, or base64 text as delivered by a CDP
+                screencast; each is converted only if its path needs it
+            format: Image format of the frame
+        """
+        header = {
+            "type": "browser_frame",
+            "agent": "browser",
+            "format": format,
+            "deviceWidth": SCREEN_WIDTH,
+            "deviceHeight": SCREEN_HEIGHT,
+        }
+        try:
+            if self.connection_manager.get_connection_count(self.project_id) > 0:
+                if isinstance(frame, str):
+                    frame = _b64decode(frame)
+                await self.connection_manager.send_binary_to_local_connections(
+                    self.project_id, header, frame
+                )
+            else:
+                header["image"] = frame if isinstance(frame, str) else _b64encode(frame)
+                await self.connection_manager.broadcast_to_project(self.project_id, header)
+        except Exception as e:
+            logger.warning(f"Failed to broadcast frame: {e}")
+    
     async def _init_browser(self, initial_url: str = "https://google.com") -> None:
         """Initialize Playwright browser."""
         logger.info("Initializing Playwright browser...")
         
-        self._playwright = await async_playwright().start()
-        self._browser = await self._playwright.chromium.launch(
-            headless=self.headless,
-            args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-        )
+        self._playwright = await get_playwright()
+        try:
+            self._browser = await self._launch_browser()
+        except Exception as e:
+            # The shared driver outlives agents and may have died since it
+            # was started; restart it and retry once
+            logger.warning(f"Browser launch failed, restarting Playwright: {e}")
+            self._playwright = await restart_playwright(self._playwright)
+            self._browser = await self._launch_browser()
         self._context = await self._browser.new_context(
             viewport={"width": SCREEN_WIDTH, "height": SCREEN_HEIGHT}
         )
@@ -255,6 +626,13 @@ class ComputerUseAgent:
         await self._page.goto(initial_url, wait_until="domcontentloaded")
         logger.info(f"Browser initialized at {initial_url}")
     
+    async def _launch_browser(self) -> Browser:
+        """Launch this agent's Chromium instance on the shared driver."""
+        return await self._playwright.chromium.launch(
+            headless=self.headless,
+            args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
+        )
+    
     async def _get_screenshot(self, format: str = "png", quality: int = None) -> bytes:
         """Capture current page screenshot as bytes.
         
@@ -266,139 +644,39 @@ class ComputerUseAgent:
             return await self._page.screenshot(type="jpeg", quality=quality or 80)
         return await self._page.screenshot(type="png")
     
-    async def _get_screenshot_base64(self, format: str = "png", quality: int = None) -> str:
-        """Get screenshot as base64 string."""
-        screenshot_bytes = await self._get_screenshot(format=format, quality=quality)
-        return base64.b64encode(screenshot_bytes).decode('utf-8')
-    
-    async def _execute_action(self, function_call) -> Dict[str, Any]:
+    async def _execute_action(self, fname: str, args: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a single Computer Use action.
         
         Args:
-            function_call: The function call from model response
+            fname: Action name from the model's function call
+            args: The function call's arguments
             
         Returns:
             Result dict with any error info
         """
-        fname = function_call.name
-        args = dict(function_call.args) if function_call.args else {}
-        
         logger.info(f"Executing action: {fname} with args: {args}")
         result = {}
         
         try:
-            if fname == "open_web_browser":
-                # Browser already open
-                pass
-            
-            elif fname == "navigate":
-                url = args.get("url", "")
-                await self._page.goto(url, wait_until="domcontentloaded")
-                logger.info(f"Navigated to: {url}")
-            
-            elif fname == "click_at":
-                x = denormalize_x(args.get("x", 0))
-                y = denormalize_y(args.get("y", 0))
-                await self._page.mouse.click(x, y)
-                logger.info(f"Clicked at ({x}, {y})")
-            
-            elif fname == "hover_at":
-                x = denormalize_x(args.get("x", 0))
-                y = denormalize_y(args.get("y", 0))
-                await self._page.mouse.move(x, y)
-                logger.info(f"Hovered at ({x}, {y})")
-            
-            elif fname == "type_text_at":
-                x = denormalize_x(args.get("x", 0))
-                y = denormalize_y(args.get("y", 0))
-                text = args.get("text", "")
-                press_enter = args.get("press_enter", False)
-                clear_before = args.get("clear_before_typing", False)
-                
-                # Click to focus
-                await self._page.mouse.click(x, y)
-                
-                # Clear if requested
-                if clear_before:
-                    await self._page.keyboard.press("Meta+A")
-                    await self._page.keyboard.press("Backspace")
-                
-                # Type text
-                await self._page.keyboard.type(text)
-                
-                if press_enter:
-                    await self._page.keyboard.press("Enter")
-                
-                logger.info(f"Typed text at ({x}, {y}): {text[:50]}...")
-            
-            elif fname == "key_combination":
-                keys = args.get("keys", "")
-                await self._page.keyboard.press(keys)
-                logger.info(f"Pressed keys: {keys}")
-            
-            elif fname == "scroll_document":
-                direction = args.get("direction", "down")
-                delta = 500 if direction in ["down", "right"] else -500
-                if direction in ["up", "down"]:
-                    await self._page.mouse.wheel(0, delta)
-                else:
-                    await self._page.mouse.wheel(delta, 0)
-                logger.info(f"Scrolled document: {direction}")
-            
-            elif fname == "scroll_at":
-                x = denormalize_x(args.get("x", 500))
-                y = denormalize_y(args.get("y", 500))
-                direction = args.get("direction", "down")
-                magnitude = args.get("magnitude", 400)
-                
-                await self._page.mouse.move(x, y)
-                
-                delta = magnitude if direction in ["down", "right"] else -magnitude
-                if direction in ["up", "down"]:
-                    await self._page.mouse.wheel(0, delta)
-                else:
-                    await self._page.mouse.wheel(delta, 0)
-                logger.info(f"Scrolled at ({x}, {y}): {direction} by {magnitude}")
-            
-            elif fname == "go_back":
-                await self._page.go_back()
-                logger.info("Navigated back")
-            
-            elif fname == "go_forward":
-                await self._page.go_forward()
-                logger.info("Navigated forward")
-            
-            elif fname == "wait_5_seconds":
-                await asyncio.sleep(5)
-                logger.info("Waited 5 seconds")
-            
-            elif fname == "search":
-                # Open browser search (Ctrl+F)
-                await self._page.keyboard.press("Control+F")
-                logger.info("Opened search")
-            
-            elif fname == "drag_and_drop":
-                x = denormalize_x(args.get("x", 0))
-                y = denormalize_y(args.get("y", 0))
-                dest_x = denormalize_x(args.get("destination_x", 0))
-                dest_y = denormalize_y(args.get("destination_y", 0))
-                
-                await self._page.mouse.move(x, y)
-                await self._page.mouse.down()
-                await self._page.mouse.move(dest_x, dest_y)
-                await self._page.mouse.up()
-                logger.info(f"Dragged from ({x}, {y}) to ({dest_x}, {dest_y})")
-            
-            else:
+            handler_name = self._ACTION_HANDLERS.get(fname)
+            if handler_name is None:
                 logger.warning(f"Unknown action: {fname}")
                 result["error"] = f"Unknown action: {fname}"
+            else:
+                await getattr(self, handler_name)(args)
             
-            # Wait for page to settle after action
-            try:
-                await self._page.wait_for_load_state(timeout=5000)
-            except Exception:
-                pass  # Timeout is fine
-            await asyncio.sleep(0.5)
+            # Wait for page to settle after action. For actions that may
+            # navigate, the load-state wait and the minimum settle delay
+            # overlap instead of running back to back; a load-state timeout
+            # is fine, so exceptions are swallowed.
+            if fname in _NAV_ACTIONS:
+                await asyncio.gather(
+                    self._page.wait_for_load_state(timeout=5000),
+                    asyncio.sleep(NAV_SETTLE_DELAY),
+                    return_exceptions=True,
+                )
+            else:
+                await asyncio.sleep(INPUT_SETTLE_DELAY)
             
         except Exception as e:
             logger.error(f"Error executing {fname}: {e}")
@@ -406,17 +684,121 @@ class ComputerUseAgent:
         
         return result
     
-    async def _check_safety_decision(self, function_call) -> bool:
+    async def _action_open_web_browser(self, args: Dict[str, Any]) -> None:
+        """Browser is already open; nothing to do."""
+    
+    async def _action_navigate(self, args: Dict[str, Any]) -> None:
+        url = args.get("url", "")
+        await self._page.goto(url, wait_until="domcontentloaded")
+        logger.info(f"Navigated to: {url}")
+    
+    async def _action_click_at(self, args: Dict[str, Any]) -> None:
+        x = denormalize_x(args.get("x", 0))
+        y = denormalize_y(args.get("y", 0))
+        await self._page.mouse.click(x, y)
+        logger.info(f"Clicked at ({x}, {y})")
+    
+    async def _action_hover_at(self, args: Dict[str, Any]) -> None:
+        x = denormalize_x(args.get("x", 0))
+        y = denormalize_y(args.get("y", 0))
+        await self._page.mouse.move(x, y)
+        logger.info(f"Hovered at ({x}, {y})")
+    
+    async def _action_type_text_at(self, args: Dict[str, Any]) -> None:
+        mouse = self._page.mouse
+        keyboard = self._page.keyboard
+        x = denormalize_x(args.get("x", 0))
+        y = denormalize_y(args.get("y", 0))
+        text = args.get("text", "")
+        press_enter = args.get("press_enter", False)
+        clear_before = args.get("clear_before_typing", False)
+        
+        # Click to focus
+        await mouse.click(x, y)
+        
+        # Clear if requested
+        if clear_before:
+            await keyboard.press("Meta+A")
+            await keyboard.press("Backspace")
+        
+        # Type text
+        await keyboard.type(text)
+        
+        if press_enter:
+            await keyboard.press("Enter")
+        
+        logger.info(f"Typed text at ({x}, {y}): {text[:50]}...")
+    
+    async def _action_key_combination(self, args: Dict[str, Any]) -> None:
+        keys = args.get("keys", "")
+        await self._page.keyboard.press(keys)
+        logger.info(f"Pressed keys: {keys}")
+    
+    async def _action_scroll_document(self, args: Dict[str, Any]) -> None:
+        direction = args.get("direction", "down")
+        delta = 500 if direction in _POSITIVE_SCROLL_DIRECTIONS else -500
+        if direction in _VERTICAL_SCROLL_DIRECTIONS:
+            await self._page.mouse.wheel(0, delta)
+        else:
+            await self._page.mouse.wheel(delta, 0)
+        logger.info(f"Scrolled document: {direction}")
+    
+    async def _action_scroll_at(self, args: Dict[str, Any]) -> None:
+        mouse = self._page.mouse
+        x = denormalize_x(args.get("x", 500))
+        y = denormalize_y(args.get("y", 500))
+        direction = args.get("direction", "down")
+        magnitude = args.get("magnitude", 400)
+        
+        await mouse.move(x, y)
+        
+        delta = magnitude if direction in _POSITIVE_SCROLL_DIRECTIONS else -magnitude
+        if direction in _VERTICAL_SCROLL_DIRECTIONS:
+            await mouse.wheel(0, delta)
+        else:
+            await mouse.wheel(delta, 0)
+        logger.info(f"Scrolled at ({x}, {y}): {direction} by {magnitude}")
+    
+    async def _action_go_back(self, args: Dict[str, Any]) -> None:
+        await self._page.go_back()
+        logger.info("Navigated back")
+    
+    async def _action_go_forward(self, args: Dict[str, Any]) -> None:
+        await self._page.go_forward()
+        logger.info("Navigated forward")
+    
+    async def _action_wait_5_seconds(self, args: Dict[str, Any]) -> None:
+        await asyncio.sleep(5)
+        logger.info("Waited 5 seconds")
+    
+    async def _action_search(self, args: Dict[str, Any]) -> None:
+        # Open browser search (Ctrl+F)
+        await self._page.keyboard.press("Control+F")
+        logger.info("Opened search")
+    
+    async def _action_drag_and_drop(self, args: Dict[str, Any]) -> None:
+        mouse = self._page.mouse
+        x = denormalize_x(args.get("x", 0))
+        y = denormalize_y(args.get("y", 0))
+        dest_x = denormalize_x(args.get("destination_x", 0))
+        dest_y = denormalize_y(args.get("destination_y", 0))
+        
+        await mouse.move(x, y)
+        await mouse.down()
+        await mouse.move(dest_x, dest_y)
+        await mouse.up()
+        logger.info(f"Dragged from ({x}, {y}) to ({dest_x}, {dest_y})")
+    
+    async def _check_safety_decision(self, fname: str, args: Dict[str, Any]) -> bool:
         """Check for safety decision and get user confirmation if needed.
         
         Args:
-            function_call: The function call with potential safety_decision
+            fname: Action name from the model's function call
+            args: The function call's arguments, with potential safety_decision
             
         Returns:
             True if action should proceed, False if denied
         """
-        args = dict(function_call.args) if function_call.args else {}
-        
         if "safety_decision" not in args:
             return True
         
@@ -432,7 +814,7 @@ class ComputerUseAgent:
         # Broadcast to frontend for confirmation
         await self._broadcast("safety_confirmation_required", {
             "explanation": explanation,
-            "action": function_call.name,
+            "action": fname,
         })
         
         # In a real implementation, wait for user response
@@ -441,66 +823,81 @@ class ComputerUseAgent:
         logger.warning("Auto-approving safety confirmation (implement proper flow)")
         return True
     
-    async def _execute_function_calls(self, candidate) -> List[tuple]:
-        """Execute all function calls from model response.
+    async def _execute_function_calls(self, calls: asyncio.Queue) -> Tuple[List[tuple], Dict]:
+        """Execute a turn's function calls in order as they arrive.
         
         Args:
-            candidate: Response candidate containing function calls
+            calls: Queue of function calls streamed from the model turn,
+                terminated by None
             
         Returns:
-            List of (function_name, result_dict) tuples
+            List of (function_name, result_dict) tuples, and the turn's
+            tool_batch event data for the frontend
         """
         results = []
+        # Tool events are sent to the frontend as one batch per turn
+        executions = []
+        tool_results = []
         
-        for part in candidate.content.parts:
-            if not part.function_call:
-                continue
-            
-            function_call = part.function_call
+        while (function_call := await calls.get()) is not None:
+            fname = function_call.name
+            # Copied once and shared by the safety check, the tool event and
+            # the action itself
+            args = dict(function_call.args) if function_call.args else {}
             
             # Check safety decision
-            should_proceed = await self._check_safety_decision(function_call)
+            should_proceed = await self._check_safety_decision(fname, args)
             if not should_proceed:
-                results.append((function_call.name, {"error": "User denied action"}))
+                results.append((fname, {"error": "User denied action"}))
                 continue
             
-            # Broadcast tool execution
-            await self._broadcast("tool_execution", {
-                "tool": function_call.name,
-                "message": f"Executing {function_call.name}...",
-                "input": dict(function_call.args) if function_call.args else {},
+            executions.append({
+                "tool": fname,
+                "message": f"Executing {fname}...",
+                "input": args,
             })
             
             # Execute the action
-            result = await self._execute_action(function_call)
+            result = await self._execute_action(fname, args)
             
             # Check for safety acknowledgement
-            args = dict(function_call.args) if function_call.args else {}
             if "safety_decision" in args:
                 result["safety_acknowledgement"] = "true"
             
-            results.append((function_call.name, result))
+            results.append((fname, result))
             
-            # Broadcast tool result
-            await self._broadcast("tool_result", {
-                "tool": function_call.name,
+            tool_results.append({
+                "tool": fname,
                 "result": str(result) if result else "Success",
             })
         
-        return results
+        return results, {"executions": executions, "results": tool_results}
     
-    async def _get_function_responses(self, results: List[tuple]) -> List:
+    def _get_function_responses(self, results: List[tuple], screenshot_bytes: bytes) -> List:
         """Build function responses with screenshot.
         
         Args:
             results: List of (function_name, result_dict) tuples
+            screenshot_bytes: Post-action PNG screenshot
             
         Returns:
             List of FunctionResponse objects
         """
-        screenshot_bytes = await self._get_screenshot(format="png")
         current_url = self._page.url
         
+        # Every response in this turn carries the same post-action
+        # screenshot, so build the image part once and share it. Whether it
+        # is actually sent is decided by _drop_unchanged_screenshot() once
+        # the history has been trimmed for the next request.
+        parts = [
+            types.FunctionResponsePart(
+                inline_data=types.FunctionResponseBlob(
+                    mime_type="image/png",
+                    data=screenshot_bytes
+                )
+            )
+        ]
+        
         function_responses = []
         for name, result in results:
             response_data = {"url": current_url}
@@ -510,19 +907,199 @@ class ComputerUseAgent:
                 types.FunctionResponse(
                     name=name,
                     response=response_data,
-                    parts=[
-                        types.FunctionResponsePart(
-                            inline_data=types.FunctionResponseBlob(
-                                mime_type="image/png",
-                                data=screenshot_bytes
-                            )
-                        )
-                    ]
+                    parts=parts
                 )
             )
         
         return function_responses
     
+    def _latest_context_screenshot(self, contents: Optional[List[Content]] = None) -> Optional[bytes]:
+        """Return the newest screenshot still present in the history.
+        
+        Args:
+            contents: Turns to search; defaults to the whole history
+        
+        Returns:
+            PNG bytes of the most recent image part in the conversation, or
+            None if every screenshot has been pruned or trimmed away
+        """
+        for content in reversed(self._contents if contents is None else contents):
+            for part in reversed(content.parts or []):
+                if part.inline_data and part.inline_data.data:
+                    return part.inline_data.data
+                if part.function_response and part.function_response.parts:
+                    for response_part in part.function_response.parts:
+                        if response_part.inline_data and response_part.inline_data.data:
+                            return response_part.inline_data.data
+        return None
+    
+    async def _generate_turn(
+        self,
+        on_function_call: Optional[Callable[[types.FunctionCall], None]] = None,
+    ) -> Content:
+        """Stream one model turn and assemble it into a single Content.
+        
+        Uses the SDK's native async streaming API, so no executor thread is
+        held for the duration of the call and parts arrive as soon as they
+        are generated. Streamed text fragments are merged back together.
+        
+        Args:
+            on_function_call: Called with each function call as soon as its
+                part arrives, before the rest of the turn has streamed
+        
+        Returns:
+            The model turn, ready to append to the conversation history
+        """
+        parts: List[Part] = []
+        stream = await self.client.aio.models.generate_content_stream(
+            model=COMPUTER_USE_MODEL,
+            contents=self._contents,
+            config=COMPUTER_USE_CONFIG,
+        )
+        async for chunk in stream:
+            if not chunk.candidates or not chunk.candidates[0].content:
+                continue
+            for part in chunk.candidates[0].content.parts or []:
+                _append_streamed_part(parts, part)
+                if part.function_call and on_function_call:
+                    on_function_call(part.function_call)
+        
+        if not parts:
+            raise ValueError("Model returned an empty response")
+        return Content(role="model", parts=parts)
+    
+    def _prune_old_screenshots(self) -> None:
+        """Drop screenshots from all but the most recent turns of the history.
+        
+        Every iteration adds a full-page PNG, so without pruning each request
+        re-sends every screenshot taken so far. Older function responses keep
+        their name and response data but lose their image parts, noting the
+        omission in the response data; inline images (the initial
+        screenshot) are replaced with a short text stub.
+        """
+        screenshot_turns = 0
+        for content in reversed(self._contents):
+            if content.role != "user" or not content.parts:
+                continue
+            
+            has_screenshot = any(
+                part.inline_data
+                or (part.function_response and part.function_response.parts)
+                for part in content.parts
+            )
+            if not has_screenshot:
+                continue
+            
+            screenshot_turns += 1
+            if screenshot_turns <= self.max_recent_screenshots:
+                continue
+            
+            for index, part in enumerate(content.parts):
+                if part.inline_data:
+                    content.parts[index] = Part(text=OMITTED_SCREENSHOT_TEXT)
+                elif part.function_response and part.function_response.parts:
+                    part.function_response.parts = None
+                    if part.function_response.response is not None:
+                        part.function_response.response["screenshot"] = OMITTED_SCREENSHOT_TEXT
+    
+    def _drop_unchanged_screenshot(self) -> None:
+        """Drop the newest turn's screenshot if the model can already see it.
+        
+        When the actions left the page pixel-identical to the newest image
+        still in the history (a wait, a click that missed), the function
+        responses say so instead of sending the same image again. This runs
+        after trimming and pruning, so the comparison is against the history
+        exactly as it will be sent; if the earlier copy was dropped, the
+        screenshot stays.
+        """
+        if len(self._contents) < 2:
+            return
+        
+        responses = [
+            part.function_response
+            for part in self._contents[-1].parts or []
+            if part.function_response and part.function_response.parts
+        ]
+        if not responses:
+            return
+        
+        screenshot_bytes = responses[0].parts[0].inline_data.data
+        if screenshot_bytes != self._latest_context_screenshot(self._contents[:-1]):
+            return
+        
+        for response in responses:
+            response.parts = None
+            if response.response is not None:
+                response.response["screenshot"] = UNCHANGED_SCREENSHOT_TEXT
+    
+    def _prepare_history(self) -> None:
+        """Bring the history within its budgets before a model request."""
+        self._trim_history()
+        self._prune_old_screenshots()
+        self._drop_unchanged_screenshot()
+    
+    def _trim_history(self) -> None:
+        """Drop the oldest turns once the history exceeds its turn budget.
+        
+        The initial task turn is always kept. Trimming resumes on a model
+        turn so no function response is left without the call it answers.
+        """
+        excess = len(self._contents) - 1 - self.max_history_turns
+        if excess <= 0:
+            return
+        
+        cut = 1 + excess
+        while cut < len(self._contents) and self._contents[cut].role != "model":
+            cut += 1
+        if cut < len(self._contents):
+            del self._contents[1:cut]
+    
+    async def _recovery_note(
+        self,
+        error: Exception,
+        executor: Optional[asyncio.Task],
+        actions_run: List[str],
+    ) -> Content:
+        """Build the user turn that reports a failed iteration to the model.
+        
+        Function calls that streamed in before the failure have already
+        acted on the page, so they are left to finish. Since the model turn
+        that asked for them is dropped along with its results, the note
+        names every action run during the current streak of failures and
+        carries a fresh screenshot.
+        
+        Args:
+            error: The error that ended the iteration
+            executor: The iteration's function call task, if it was started
+            actions_run: Actions run by earlier failed iterations in this
+                streak; extended with this iteration's
+        
+        Returns:
+            The recovery note content
+        """
+        results: List[tuple] = []
+        if executor is not None and not executor.cancelled():
+            try:
+                results, _ = await executor
+            except Exception as e:
+                logger.warning(f"Function calls failed during recovery: {e}")
+        
+        actions_run.extend(name for name, _ in results)
+        if not actions_run:
+            return Content(role="user", parts=[Part(text=f"Error occurred: {error}. Please try a different approach.")])
+        
+        text = f"Error occurred: {error}. These actions had already run: {', '.join(actions_run)}."
+        try:
+            screenshot_bytes = await self._get_screenshot(format="png")
+        except Exception as e:
+            logger.warning(f"Failed to capture recovery screenshot: {e}")
+            return Content(role="user", parts=[Part(text=f"{text} Please try a different approach.")])
+        
+        return Content(role="user", parts=[
+            Part(text=f"{text} The current screen is attached. Please try a different approach."),
+            Part(inline_data=types.Blob(mime_type="image/png", data=screenshot_bytes)),
+        ])
+    
     async def run(self, user_message: str, initial_url: str = "https://google.com") -> str:
         """Run the Computer Use agent with a user message.
         
@@ -561,33 +1138,23 @@ class ComputerUseAgent:
         # Start background streaming for smooth frontend
         await self._start_streaming()
         
-        # Configure Computer Use tool
-        config = types.GenerateContentConfig(
-             system_instruction=SYSTEM_PROMPT,
-            tools=[
-                types.Tool(
-                    computer_use=types.ComputerUse(
-                        environment=types.Environment.ENVIRONMENT_BROWSER
-                    )
-                )
-            ],
-            # Enable thinking for better reasoning
-            thinking_config=types.ThinkingConfig(include_thoughts=True),
-        )
-        
         # Initialize conversation with user message and screenshot
         self._contents = [
             Content(
                 role="user",
                 parts=[
                     Part(text=user_message),
-                    Part.from_bytes(data=initial_screenshot_png, mime_type="image/png")
+                    # Raw PNG bytes; the SDK base64-encodes them once when serializing the request
+                    Part(inline_data=types.Blob(mime_type="image/png", data=initial_screenshot_png)),
                 ]
             )
         ]
         
         final_response = ""
         agent_completed = False
+        consecutive_failures = 0
+        # Actions run by failed iterations, whose model turns were dropped
+        failed_turn_actions: List[str] = []
         
         # Agent loop
         try:
@@ -597,41 +1164,54 @@ class ComputerUseAgent:
                     break
                 
                 logger.info(f"Agent iteration {iteration}")
+                executor = None
                 
                 try:
-                    # Call model in thread to avoid blocking the stream
-                    loop = asyncio.get_running_loop()
-                    response = await loop.run_in_executor(
-                        None,
-                        lambda: self.client.models.generate_content(
-                            model=COMPUTER_USE_MODEL,
-                            contents=self._contents,
-                            config=config,
-                        )
-                    )
+                    self._prepare_history()
                     
-                    candidate = response.candidates[0]
-                    self._contents.append(candidate.content)
+                    # Function calls start executing, in order, as soon as
+                    # they stream in rather than after the whole turn
+                    calls: asyncio.Queue = asyncio.Queue()
+                    executor = asyncio.create_task(self._execute_function_calls(calls))
                     
-                    # Check for function calls
-                    has_function_calls = any(
-                        part.function_call for part in candidate.content.parts
-                    )
+                    def on_function_call(function_call: types.FunctionCall) -> None:
+                        # The agent is acting now; stream at full rate
+                        self._model_idle.set()
+                        calls.put_nowait(function_call)
+                    
+                    self._model_idle.clear()
+                    try:
+                        content = await self._generate_turn(on_function_call)
+                    except BaseException as e:
+                        # On an error the calls that already streamed in are
+                        # left to finish (see the recovery below); only a
+                        # cancellation abandons them
+                        if not isinstance(e, Exception):
+                            executor.cancel()
+                        raise
+                    finally:
+                        self._model_idle.set()
+                        calls.put_nowait(None)
+                    self._contents.append(content)
                     
-                    if not has_function_calls:
+                    results, tool_batch = await executor
+                    
+                    if not results:
                         # No function calls - agent is done
-                        text_parts = [part.text for part in candidate.content.parts if part.text]
+                        text_parts = [part.text for part in content.parts if part.text]
                         final_response = " ".join(text_parts)
                         agent_completed = True
                         logger.info(f"Agent completed after {iteration} iterations")
                         break
                     
-                    # Execute function calls
-                    results = await self._execute_function_calls(candidate)
+                    # Capture the post-action screenshot (PNG for the model)
+                    # while the turn's tool events go out to the frontend
+                    pending = [self._get_screenshot(format="png")]
+                    if tool_batch["executions"]:
+                        pending.append(self._broadcast("tool_batch", tool_batch))
+                    screenshot_bytes, *_ = await asyncio.gather(*pending)
                     
-                    # Get new screenshot and build function responses
-                    # This explicitly uses PNG internally for the model responses
-                    function_responses = await self._get_function_responses(results)
+                    function_responses = self._get_function_responses(results, screenshot_bytes)
                     
                     # Add function responses to conversation
                     self._contents.append(
@@ -640,6 +1220,8 @@ class ComputerUseAgent:
                             parts=[Part(function_response=fr) for fr in function_responses]
                         )
                     )
+                    consecutive_failures = 0
+                    failed_turn_actions.clear()
                     
                 except Exception as e:
                     error_msg = f"Error in iteration {iteration}: {e}"
@@ -647,10 +1229,26 @@ class ComputerUseAgent:
                     # Don't broadcast logic error as agent status, just log it
                     # await self._broadcast("agent_status", {"status": "error", "message": str(e)})
                     
+                    consecutive_failures += 1
+                    
+                    # A model turn whose function calls never got responses
+                    # can't be replayed, so drop it rather than resend it
+                    if self._contents[-1].role == "model":
+                        self._contents.pop()
+                    
                     # Try to recover
-                    self._contents.append(
-                        Content(role="user", parts=[Part(text=f"Error occurred: {e}. Please try a different approach.")])
-                    )
+                    note = await self._recovery_note(e, executor, failed_turn_actions)
+                    
+                    # Replace the previous recovery note instead of stacking
+                    # one per failed iteration. The new note already names
+                    # every action run in this streak; it only lacks a
+                    # screenshot if capturing one failed
+                    if consecutive_failures > 1 and self._contents[-1].role == "user":
+                        previous = self._contents.pop()
+                        if len(note.parts) == 1:
+                            note.parts.extend(part for part in previous.parts if part.inline_data)
+                    
+                    self._contents.append(note)
         finally:
             # Stop streaming when agent is done
             await self._stop_streaming()
@@ -660,22 +1258,17 @@ class ComputerUseAgent:
             logger.warning(f"Agent reached max iterations ({self.max_iterations})")
             
             # Request summary from model
-            summary_prompt = "You have reached the maximum number of defined steps (max_iterations). Please provide a clear and concise summary of what you have found, accomplished, or verified so far based on our interaction. If you have partial results, please list them."
-            
+            self._prepare_history()
             self._contents.append(
-                Content(role="user", parts=[Part(text=summary_prompt)])
+                Content(role="user", parts=[Part(text=MAX_ITERATIONS_SUMMARY_PROMPT)])
             )
             
             try:
                 # Call model for final summary
-                loop = asyncio.get_running_loop()
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: self.client.models.generate_content(
-                        model=COMPUTER_USE_MODEL,
-                        contents=self._contents,
-                        config=config,
-                    )
+                response = await self.client.aio.models.generate_content(
+                    model=COMPUTER_USE_MODEL,
+                    contents=self._contents,
+                    config=COMPUTER_USE_CONFIG,
                 )
                 
                 if response.candidates and response.candidates[0].content.parts:
@@ -697,6 +1290,10 @@ class ComputerUseAgent:
     async def handle_user_interaction(self, interaction: Dict) -> None:
         """Handle user interaction from frontend (mouse/keyboard events).
         
+        The payload may be a single event or a batch (list) of events sent
+        in one WebSocket message. Within a batch, a run of consecutive
+        pointer moves collapses to its last position.
+        
         Args:
             interaction: Dict with type and payload
         """
@@ -705,44 +1302,55 @@ class ComputerUseAgent:
             return
         
         payload = interaction.get("payload", interaction)
-        event_type = payload.get("type", "")
+        events = payload if isinstance(payload, list) else [payload]
+        
+        last_index = len(events) - 1
+        for index, event in enumerate(events):
+            if (
+                index < last_index
+                and _is_mouse_move(event)
+                and _is_mouse_move(events[index + 1])
+            ):
+                continue
+            await self._apply_user_interaction(event)
+    
+    async def _apply_user_interaction(self, payload: Dict) -> None:
+        """Apply a single user interaction event to the page.
+        
+        Args:
+            payload: Event dict (input_mouse, input_keyboard or set_viewport)
+        """
+        page = self._page
         
         try:
-            if event_type == "input_mouse":
-                x = payload.get("x", 0)
-                y = payload.get("y", 0)
-                mouse_event = payload.get("eventType", "")
-                
-                if mouse_event == "mouseMoved":
-                    await self._page.mouse.move(x, y)
-                elif mouse_event == "mousePressed":
-                    await self._page.mouse.move(x, y)
-                    await self._page.mouse.down(button=payload.get("button", "left"))
-                elif mouse_event == "mouseReleased":
-                    await self._page.mouse.move(x, y)
-                    await self._page.mouse.up(button=payload.get("button", "left"))
+            # Bound once: Playwright exposes these as properties on the page
+            mouse = page.mouse
+            keyboard = page.keyboard
             
-            elif event_type == "input_keyboard":
-                key_event = payload.get("eventType", "")
-                
-                if key_event == "type":
-                    text = payload.get("text", "")
-                    await self._page.keyboard.type(text)
-                elif key_event == "press":
-                    key = payload.get("key", "")
-                    await self._page.keyboard.press(key)
-                elif key_event == "keyDown":
-                    key = payload.get("key", "")
-                    await self._page.keyboard.down(key)
-                elif key_event == "keyUp":
-                    key = payload.get("key", "")
-                    await self._page.keyboard.up(key)
-            
-            elif event_type == "set_viewport":
-                width = payload.get("width", SCREEN_WIDTH)
-                height = payload.get("height", SCREEN_HEIGHT)
-                await self._page.set_viewport_size({"width": width, "height": height})
-                logger.info(f"Viewport changed to {width}x{height}")
+            # Single structural match on (event type, sub-event) instead of
+            # nested if/elif ladders re-reading the payload
+            match payload.get("type", ""), payload.get("eventType", ""):
+                case "input_mouse", "mouseMoved":
+                    await mouse.move(payload.get("x", 0), payload.get("y", 0))
+                case "input_mouse", "mousePressed":
+                    await mouse.move(payload.get("x", 0), payload.get("y", 0))
+                    await mouse.down(button=payload.get("button", "left"))
+                case "input_mouse", "mouseReleased":
+                    await mouse.move(payload.get("x", 0), payload.get("y", 0))
+                    await mouse.up(button=payload.get("button", "left"))
+                case "input_keyboard", "type":
+                    await keyboard.type(payload.get("text", ""))
+                case "input_keyboard", "press":
+                    await keyboard.press(payload.get("key", ""))
+                case "input_keyboard", "keyDown":
+                    await keyboard.down(payload.get("key", ""))
+                case "input_keyboard", "keyUp":
+                    await keyboard.up(payload.get("key", ""))
+                case "set_viewport", _:
+                    width = payload.get("width", SCREEN_WIDTH)
+                    height = payload.get("height", SCREEN_HEIGHT)
+                    await page.set_viewport_size({"width": width, "height": height})
+                    logger.info(f"Viewport changed to {width}x{height}")
                 
         except Exception as e:
             logger.warning(f"Error handling interaction: {e}")
@@ -755,17 +1363,20 @@ class ComputerUseAgent:
         """Close browser and cleanup resources."""
         self._stop_requested = True
         
+        # Cancel streaming up front rather than letting an in-flight capture
+        # race the browser shutdown
+        await self._stop_streaming()
+        
         if self._browser:
             try:
-                await self._browser.close()
+                async with asyncio.timeout(CLOSE_STEP_TIMEOUT):
+                    await self._browser.close()
+            except TimeoutError:
+                logger.warning(f"Timed out closing browser after {CLOSE_STEP_TIMEOUT}s")
             except Exception as e:
                 logger.warning(f"Error closing browser: {e}")
         
-        if self._playwright:
-            try:
-                await self._playwright.stop()
-            except Exception as e:
-                logger.warning(f"Error stopping playwright: {e}")
+        # The Playwright driver is shared; shutdown_playwright() stops it
         
         logger.info("Computer Use agent closed")
 
@@ -797,4 +1408,11 @@ async def run_computer_use_agent(
     try:
         return await agent.run(user_message, initial_url)
     finally:
-        await agent.close()
\ No newline at end of file
+        # Shield teardown from caller cancellation so the browser is always
+        # closed; close() bounds each of its own steps with a timeout
+        close_task = asyncio.ensure_future(agent.close())
+        try:
+            await asyncio.shield(close_task)
+        except asyncio.CancelledError:
+            await close_task
+            raise
\ No newline at end of file
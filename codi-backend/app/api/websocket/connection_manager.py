@@ -1,16 +1,35 @@
 """WebSocket connection manager for real-time agent updates."""
 import asyncio
-import json
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Set
+import struct
+from typing import Any, Dict, List, Optional, Set, Union
 
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
 
+from app.api.websocket.redis_broadcaster import publish_to_websocket
 from app.utils.logging import get_logger
+from app.utils.serialization import utc_isoformat
 
 logger = get_logger(__name__)
 
 
+def encode_binary_message(header: Dict[str, Any], data: bytes) -> bytes:
+    """Pack a JSON header and a raw payload into one binary WebSocket message.
+    
+    Wire format: 4-byte little-endian header length, UTF-8 JSON header,
+    then the raw payload bytes (e.g. a JPEG frame, without base64).
+    
+    Args:
+        header: Message metadata, including its "type"
+        data: Raw payload bytes
+        
+    Returns:
+        Encoded binary message
+    """
+    header_bytes = orjson.dumps(header, option=orjson.OPT_NON_STR_KEYS)
+    return b"".join((struct.pack("<I", len(header_bytes)), header_bytes, data))
+
+
 class ConnectionManager:
     """Manager for WebSocket connections to handle real-time updates."""
 
@@ -114,7 +133,9 @@ class ConnectionManager:
             message: Message to send (will be JSON encoded)
         """
         try:
-            await websocket.send_json(message)
+            await websocket.send_text(
+                orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+            )
         except Exception as e:
             logger.error(f"Failed to send personal message: {e}")
             await self.disconnect(websocket)
@@ -135,11 +156,10 @@ class ConnectionManager:
         """
         # Add timestamp if not present
         if "timestamp" not in message:
-            message["timestamp"] = datetime.utcnow().isoformat()
+            message["timestamp"] = utc_isoformat()
 
         # Publish via Redis - the subscriber will handle local connections
         try:
-            from app.api.websocket.redis_broadcaster import publish_to_websocket
             await publish_to_websocket(project_id, message)
         except Exception as e:
             logger.warning(f"Failed to publish via Redis: {e}")
@@ -160,19 +180,75 @@ class ConnectionManager:
             project_id: Project ID to broadcast to
             message: Message to send
         """
+        connections = await self._get_local_connections(project_id)
+        if not connections:
+            return
+
+        # Encode once for all recipients; orjson is much faster than stdlib
+        # json on the large base64 strings carried by browser frames
+        try:
+            payload = orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError as e:
+            logger.error(f"Failed to encode message for project {project_id}: {e}")
+            return
+
+        await self._send_to_sockets(connections, payload)
+
+    async def send_binary_to_local_connections(
+        self,
+        project_id: int,
+        header: Dict[str, Any],
+        data: bytes,
+    ) -> None:
+        """Send a binary message directly to local WebSocket connections.
+        
+        Used for browser frames so the image travels as raw bytes instead of
+        base64 inside JSON. See encode_binary_message for the wire format.
+        
+        Args:
+            project_id: Project ID to broadcast to
+            header: Message metadata, including its "type"
+            data: Raw payload bytes
+        """
+        connections = await self._get_local_connections(project_id)
+        if not connections:
+            return
+
+        try:
+            payload = encode_binary_message(header, data)
+        except TypeError as e:
+            logger.error(f"Failed to encode binary message for project {project_id}: {e}")
+            return
+
+        await self._send_to_sockets(connections, payload)
+
+    async def _get_local_connections(self, project_id: int) -> Set[WebSocket]:
+        """Snapshot the local connections for a project."""
         async with self._lock:
             connections = self._connections.get(project_id, set()).copy()
 
         if not connections:
             logger.debug(f"No local connections for project {project_id}")
-            return
+        return connections
 
-        # Send to all connections concurrently
+    async def _send_to_sockets(
+        self,
+        connections: Set[WebSocket],
+        payload: Union[str, bytes],
+    ) -> None:
+        """Send an encoded payload to connections concurrently.
+        
+        Text payloads go out as text frames and bytes as binary frames.
+        Sockets that fail are disconnected.
+        """
         disconnected: List[WebSocket] = []
 
         async def send_to_socket(ws: WebSocket) -> None:
             try:
-                await ws.send_json(message)
+                if isinstance(payload, bytes):
+                    await ws.send_bytes(payload)
+                else:
+                    await ws.send_text(payload)
             except Exception as e:
                 logger.error(f"Failed to broadcast to websocket: {e}")
                 disconnected.append(ws)
@@ -186,13 +262,6 @@ class ConnectionManager:
         for ws in disconnected:
             await self.disconnect(ws)
 
-        # logger.debug(
-        #     f"Broadcast to project",
-        #     project_id=project_id,
-        #     message_type=message.get("type"),
-        #     recipients=len(connections) - len(disconnected),
-        # )
-
     async def send_agent_status(
         self,
         project_id: int,
@@ -3,27 +3,103 @@
 Updated for Gemini 2.5 Computer Use - uses Python Playwright directly instead of Node.js browser-agent.
 """
 import asyncio
-import base64
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Coroutine, Dict, Optional, Set
 
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
 
 from app.utils.logging import get_logger
 from app.api.websocket.connection_manager import connection_manager
+from app.api.websocket.redis_broadcaster import redis_broadcaster
 
 logger = get_logger(__name__)
 
 
 # Track active browser agents by project_id for interaction routing
 _active_browser_agents: Dict[int, Any] = {}
-# Track active streaming tasks by project_id to ensure they are cancelled
-_active_streaming_tasks: Dict[int, asyncio.Task] = {}
+# Strong references to fire-and-forget tasks so they are not garbage collected
+_background_tasks: Set[asyncio.Task] = set()
+# Latest Redis browser-session marker write per project, so a slow write
+# cannot land after a later one (e.g. a set after the session's delete)
+_session_marker_tasks: Dict[int, asyncio.Task] = {}
+
+# Upper bound (seconds) on waiting for background tasks at shutdown, so an
+# unresponsive Redis cannot hang it
+BACKGROUND_DRAIN_TIMEOUT = 5.0
+
+
+def _spawn_background(coro: Coroutine[Any, Any, None]) -> asyncio.Task:
+    """Run a non-critical coroutine without blocking the caller."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def _write_session_marker(project_id: int, coro: Coroutine[Any, Any, None]) -> asyncio.Task:
+    """Run a browser-session marker write in the background, in order.
+    
+    The write starts only once the project's previous marker write has
+    finished, so the marker always reflects the latest session change.
+    
+    Args:
+        project_id: Project whose marker is written
+        coro: The Redis set or delete to run
+    """
+    previous = _session_marker_tasks.get(project_id)
+    
+    async def write_in_order() -> None:
+        try:
+            if previous is not None and not previous.done():
+                # Waits without raising; the previous write logs its own errors
+                await asyncio.wait([previous])
+        except asyncio.CancelledError:
+            coro.close()
+            raise
+        await coro
+    
+    task = _spawn_background(write_in_order())
+    _session_marker_tasks[project_id] = task
+    
+    def forget(done: asyncio.Task) -> None:
+        if _session_marker_tasks.get(project_id) is done:
+            del _session_marker_tasks[project_id]
+    
+    task.add_done_callback(forget)
+    return task
+
+
+async def drain_background_tasks() -> None:
+    """Wait for outstanding background tasks, e.g. on application shutdown."""
+    if _background_tasks:
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*_background_tasks, return_exceptions=True),
+                timeout=BACKGROUND_DRAIN_TIMEOUT,
+            )
+        except TimeoutError:
+            logger.warning(
+                f"Background tasks still running after {BACKGROUND_DRAIN_TIMEOUT}s; cancelled"
+            )
 
 
 class WebSocketHandler:
     """Handler for WebSocket messages from clients."""
 
+    # Message type -> handler method name, resolved once per message
+    _MESSAGE_HANDLERS: Dict[str, str] = {
+        "ping": "_handle_ping",
+        "user_message": "_handle_user_message",
+        "user_input_response": "_handle_user_input_response",
+        "user_interaction": "_handle_user_interaction",
+        "plan_approval": "_handle_plan_approval",
+        "start_interactive_browser": "_handle_start_interactive_browser",
+        "end_browser_session": "_handle_end_browser_session",
+        "browser_navigation": "_handle_browser_navigation",
+        "stop_browser_agent": "_handle_stop_browser_agent",
+    }
+
     def __init__(self, websocket: WebSocket, project_id: int, user_id: int) -> None:
         """Initialize WebSocket handler.
 
@@ -45,31 +121,17 @@ class WebSocketHandler:
         message_type = data.get("type", "")
         
         # Log all messages except high-frequency ones
-        if message_type not in ("ping",):
+        if message_type not in ("ping", "user_interaction"):
             logger.info(f"WS message received: {message_type}")
 
-        if message_type == "ping":
-            await self._handle_ping()
-        elif message_type == "user_message":
-            await self._handle_user_message(data)
-        elif message_type == "user_input_response":
-            await self._handle_user_input_response(data)
-        elif message_type == "user_interaction":
-            await self._handle_user_interaction(data)
-        elif message_type == "plan_approval":
-            await self._handle_plan_approval(data)
-        elif message_type == "start_interactive_browser":
-            await self._handle_start_interactive_browser(data)
-        elif message_type == "end_browser_session":
-            await self._handle_end_browser_session(data)
-        elif message_type == "browser_navigation":
-            await self._handle_browser_navigation(data)
-        elif message_type == "stop_browser_agent":
-            await self._handle_stop_browser_agent(data)
-        else:
+        handler_name = self._MESSAGE_HANDLERS.get(message_type)
+        if handler_name is None:
             logger.warning(f"Unknown WebSocket message type: {message_type}")
+            return
+
+        await getattr(self, handler_name)(data)
 
-    async def _handle_ping(self) -> None:
+    async def _handle_ping(self, data: Dict[str, Any]) -> None:
         """Handle ping message with pong response."""
         await connection_manager.send_personal_message(
             self.websocket,
@@ -140,14 +202,11 @@ class WebSocketHandler:
             )
             _active_browser_agents[self.project_id] = agent
             
-            # Store agent reference in Redis for cross-worker access
-            try:
-                from app.api.websocket.redis_broadcaster import redis_broadcaster
-                await redis_broadcaster.connect()
-                session_key = f"browser_session:{self.project_id}"
-                await redis_broadcaster._redis.set(session_key, "computer_use_active", ex=3600)
-            except Exception as e:
-                logger.warning(f"Failed to store session in Redis: {e}")
+            # Store agent reference in Redis for cross-worker access (off the critical path)
+            _write_session_marker(
+                self.project_id,
+                redis_broadcaster.set_browser_session(self.project_id, "computer_use_active"),
+            )
             
             try:
                 # Run browser agent (handles its own WebSocket broadcasting)
@@ -155,13 +214,13 @@ class WebSocketHandler:
             finally:
                 # Cleanup tracking and resources
                 _active_browser_agents.pop(self.project_id, None)
-                await agent.close()
                 
-                # Remove from Redis
-                try:
-                    await redis_broadcaster._redis.delete(session_key)
-                except Exception:
-                    pass
+                # Nobody waits on the Redis marker; drop it in the background
+                # (after the write above) while the browser shuts down
+                _write_session_marker(
+                    self.project_id, redis_broadcaster.delete_browser_session(self.project_id)
+                )
+                await agent.close()
                 
         except Exception as e:
             logger.error(f"Browser agent failed: {e}")
@@ -178,7 +237,7 @@ class WebSocketHandler:
         User can directly control the browser via mouse/keyboard.
         Uses Python Playwright directly.
         """
-        from app.agent.computer_use_agent import ComputerUseAgent, SCREEN_WIDTH, SCREEN_HEIGHT
+        from app.agent.computer_use_agent import ComputerUseAgent
         
         initial_url = data.get("initial_url", "https://google.com")
         
@@ -202,14 +261,11 @@ class WebSocketHandler:
             # Store agent for interaction handling
             _active_browser_agents[self.project_id] = agent
             
-            # Store session in Redis
-            try:
-                from app.api.websocket.redis_broadcaster import redis_broadcaster
-                await redis_broadcaster.connect()
-                session_key = f"browser_session:{self.project_id}"
-                await redis_broadcaster._redis.set(session_key, "interactive_active", ex=3600)
-            except Exception as e:
-                logger.warning(f"Failed to store session in Redis: {e}")
+            # Store session in Redis (off the critical path)
+            _write_session_marker(
+                self.project_id,
+                redis_broadcaster.set_browser_session(self.project_id, "interactive_active"),
+            )
             
             # Notify frontend that session is ready
             await connection_manager.broadcast_to_project(
@@ -224,53 +280,9 @@ class WebSocketHandler:
                 }
             )
             
-            # Start streaming frames in background
-            async def stream_frames():
-                """Background task to stream frames from Playwright to frontend."""
-                frame_count = 0
-                try:
-                    while agent._page and not agent._stop_requested:
-                        try:
-                            # Capture screenshot in JPEG for speed (reduced quality for FPS)
-                            start_time = datetime.utcnow()
-                            screenshot_bytes = await agent._get_screenshot(format="jpeg", quality=50)
-                            screenshot_b64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-                            
-                            # Forward frame to frontend
-                            await connection_manager.broadcast_to_project(
-                                self.project_id,
-                                {
-                                    "type": "browser_frame",
-                                    "agent": "browser",
-                                    "image": screenshot_b64,
-                                    "format": "jpeg",
-                                    "timestamp": datetime.utcnow().isoformat(),
-                                    "deviceWidth": SCREEN_WIDTH,
-                                    "deviceHeight": SCREEN_HEIGHT,
-                                }
-                            )
-                            
-                            frame_count += 1
-                            if frame_count % 100 == 0:
-                                logger.debug(f"Streamed {frame_count} frames for project {self.project_id}")
-                            
-                            # Calculate sleep time to maintain ~30 FPS (33ms target)
-                            elapsed = (datetime.utcnow() - start_time).total_seconds()
-                            sleep_time = max(0.001, 0.033 - elapsed)
-                            await asyncio.sleep(sleep_time)
-                            
-                        except Exception as e:
-                            logger.warning(f"Frame capture error: {e}")
-                            await asyncio.sleep(0.1)
-                            
-                except Exception as stream_err:
-                    logger.warning(f"Interactive browser stream error: {stream_err}")
-                finally:
-                    logger.info(f"Interactive browser stream ended for project {self.project_id}")
-            
-            # Start the streaming as a background task
-            stream_task = asyncio.create_task(stream_frames())
-            _active_streaming_tasks[self.project_id] = stream_task
+            # Stream frames through the agent's capture/flush pipeline, which
+            # coalesces to the newest frame whenever delivery falls behind
+            await agent._start_streaming()
             logger.info(f"Started interactive browser session for project {self.project_id}")
             
         except Exception as e:
@@ -288,35 +300,21 @@ class WebSocketHandler:
         
         try:
             # Get active agent
-            agent = _active_browser_agents.get(self.project_id)
+            agent = _active_browser_agents.pop(self.project_id, None)
             
             if agent:
-                # Stop and close
                 agent.stop()
+            
+            # Nobody waits on the Redis marker; drop it in the background
+            # (after any pending write) while the browser shuts down
+            _write_session_marker(
+                self.project_id, redis_broadcaster.delete_browser_session(self.project_id)
+            )
+            
+            if agent:
                 await agent.close()
-                _active_browser_agents.pop(self.project_id, None)
-                
-                # Cancel streaming task
-                stream_task = _active_streaming_tasks.pop(self.project_id, None)
-                if stream_task:
-                    stream_task.cancel()
-                    try:
-                        await stream_task
-                    except asyncio.CancelledError:
-                        pass
-                    logger.info(f"Cancelled streaming task for project {self.project_id}")
-                    
                 logger.info(f"Closed browser agent for project {self.project_id}")
             
-            # Remove from Redis
-            try:
-                from app.api.websocket.redis_broadcaster import redis_broadcaster
-                await redis_broadcaster.connect()
-                session_key = f"browser_session:{self.project_id}"
-                await redis_broadcaster._redis.delete(session_key)
-            except Exception as e:
-                logger.warning(f"Failed to remove session from Redis: {e}")
-            
             # Notify frontend
             await connection_manager.broadcast_to_project(
                 self.project_id,
@@ -338,17 +336,8 @@ class WebSocketHandler:
         agent = _active_browser_agents.get(self.project_id)
         if agent:
             agent.stop()
-            
-            # Cancel streaming task
-            stream_task = _active_streaming_tasks.get(self.project_id)
-            if stream_task:
-                stream_task.cancel()
-                try:
-                    await stream_task
-                except asyncio.CancelledError:
-                    pass
-                _active_streaming_tasks.pop(self.project_id, None)
-                logger.info(f"Cancelled streaming task for project {self.project_id}")
+            # The session stays open, so close() won't run to stop the stream
+            await agent._stop_streaming()
 
             await connection_manager.broadcast_to_project(
                 self.project_id,
@@ -590,7 +579,6 @@ class WebSocketHandler:
                         
                         # Send signal to agent via Redis
                         try:
-                            from app.api.websocket.redis_broadcaster import redis_broadcaster
                             await redis_broadcaster.send_agent_signal(
                                 self.project_id,
                                 "plan_approval",
@@ -634,9 +622,8 @@ async def websocket_endpoint_handler(
 
     try:
         while True:
-            # Receive message
-            data = await websocket.receive_json()
-            logger.info(f"WS raw recv: {data.get('type', 'unknown')}")
+            # Receive message (parsed with orjson; interaction bursts make this hot)
+            data = orjson.loads(await websocket.receive_text())
             await handler.handle_message(data)
 
     except WebSocketDisconnect:
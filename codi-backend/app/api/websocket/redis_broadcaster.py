@@ -5,9 +5,9 @@ Celery workers publish messages to Redis, and FastAPI subscribes and broadcasts
 to actual WebSocket connections.
 """
 import asyncio
-import json
 from typing import Any, Dict, Optional
 
+import orjson
 import redis.asyncio as aioredis
 
 from app.core.config import settings
@@ -18,6 +18,16 @@ logger = get_logger(__name__)
 # Redis pub/sub channel for WebSocket messages
 WEBSOCKET_CHANNEL = "codi:websocket:messages"
 
+# Upper bound on pooled Redis connections shared by this process
+REDIS_MAX_CONNECTIONS = 100
+
+# Seconds a caller waits for a free pooled connection before erroring
+REDIS_POOL_TIMEOUT = 5
+
+# Browser session bookkeeping (which project has a live browser)
+BROWSER_SESSION_KEY = "browser_session:{project_id}"
+BROWSER_SESSION_TTL = 3600
+
 
 class RedisBroadcaster:
     """Redis-based broadcaster for cross-process WebSocket messaging.
@@ -46,13 +56,22 @@ class RedisBroadcaster:
         logger.info("RedisBroadcaster initialized")
     
     async def connect(self) -> None:
-        """Connect to Redis."""
+        """Connect to Redis.
+        
+        Idempotent: the FastAPI process connects once at startup, and Celery
+        workers connect lazily on their first publish.
+        """
         if self._redis is None:
-            self._redis = aioredis.from_url(
+            # A blocking pool makes callers wait for a free connection
+            # under load instead of failing with "Too many connections"
+            pool = aioredis.BlockingConnectionPool.from_url(
                 settings.redis_url,
                 encoding="utf-8",
                 decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_POOL_TIMEOUT,
             )
+            self._redis = aioredis.Redis.from_pool(pool)
             logger.info("Connected to Redis for broadcasting")
     
     async def disconnect(self) -> None:
@@ -83,10 +102,13 @@ class RedisBroadcaster:
         """
         await self.connect()
         
-        payload = json.dumps({
-            "project_id": project_id,
-            "message": message,
-        })
+        payload = orjson.dumps(
+            {
+                "project_id": project_id,
+                "message": message,
+            },
+            option=orjson.OPT_NON_STR_KEYS,
+        )
         
         try:
             await self._redis.publish(WEBSOCKET_CHANNEL, payload)
@@ -105,10 +127,13 @@ class RedisBroadcaster:
         await self.connect()
         
         channel = f"codi:project:{project_id}:signals"
-        payload = json.dumps({
-            "type": signal_type,
-            "data": data,
-        })
+        payload = orjson.dumps(
+            {
+                "type": signal_type,
+                "data": data,
+            },
+            option=orjson.OPT_NON_STR_KEYS,
+        )
         
         try:
             await self._redis.publish(channel, payload)
@@ -116,6 +141,45 @@ class RedisBroadcaster:
         except Exception as e:
             logger.error(f"Failed to publish signal to Redis: {e}")
     
+    async def set_browser_session(
+        self,
+        project_id: int,
+        state: str,
+        ex: int = BROWSER_SESSION_TTL,
+    ) -> None:
+        """Record an active browser session for cross-worker lookup.
+        
+        Args:
+            project_id: Project ID owning the browser session
+            state: Session state marker (e.g. 'interactive_active')
+            ex: Expiry in seconds
+        """
+        # Connected once at app startup; session bookkeeping only runs in FastAPI
+        if self._redis is None:
+            logger.warning("Redis not connected; browser session not stored")
+            return
+        
+        try:
+            await self._redis.set(
+                BROWSER_SESSION_KEY.format(project_id=project_id), state, ex=ex
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store browser session in Redis: {e}")
+    
+    async def delete_browser_session(self, project_id: int) -> None:
+        """Remove the browser session marker for a project.
+        
+        Args:
+            project_id: Project ID owning the browser session
+        """
+        if self._redis is None:
+            return
+        
+        try:
+            await self._redis.delete(BROWSER_SESSION_KEY.format(project_id=project_id))
+        except Exception as e:
+            logger.warning(f"Failed to remove browser session from Redis: {e}")
+    
     async def start_subscriber(self, on_message_callback) -> None:
         """Start subscribing to Redis for messages.
         
@@ -137,7 +201,7 @@ class RedisBroadcaster:
                 async for message in self._pubsub.listen():
                     if message["type"] == "message":
                         try:
-                            data = json.loads(message["data"])
+                            data = orjson.loads(message["data"])
                             project_id = data["project_id"]
                             ws_message = data["message"]
                             
@@ -47,6 +47,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             """
             await connection_manager.send_to_local_connections(project_id, message)
         
+        # Open the shared connection pool once, up front, so request paths
+        # never pay for connecting
+        await redis_broadcaster.connect()
         await redis_broadcaster.start_subscriber(on_redis_message)
         logger.info("Redis subscriber started for WebSocket messaging")
     except Exception as e:
@@ -57,6 +60,20 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Shutdown
     logger.info("Shutting down Codi Backend API")
     
+    # Let in-flight background Redis writes finish before disconnecting
+    try:
+        from app.api.websocket.handlers import drain_background_tasks
+        await drain_background_tasks()
+    except Exception as e:
+        logger.error(f"Error draining background tasks: {e}")
+    
+    # Stop the shared Playwright driver used by browser agents
+    try:
+        from app.agent.computer_use_agent import shutdown_playwright
+        await shutdown_playwright()
+    except Exception as e:
+        logger.error(f"Error stopping Playwright driver: {e}")
+    
     # Clean up Redis broadcaster
     try:
         from app.api.websocket.redis_broadcaster import redis_broadcaster
@@ -165,4 +182,6 @@ if __name__ == "__main__":
         port=8000,
         reload=settings.debug,
         log_level="debug" if settings.debug else "info",
+        # Browser frames are already-compressed JPEGs; deflating them is wasted CPU
+        ws_per_message_deflate=False,
     )
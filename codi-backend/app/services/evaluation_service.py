@@ -52,7 +52,7 @@ Respond with JSON in this exact format:
 Only return the JSON, nothing else.
 """
         
-        response = gemini_client.models.generate_content(
+        response = await gemini_client.aio.models.generate_content(
             model=model,
             contents=prompt
         )
@@ -111,7 +111,7 @@ Respond with JSON in this exact format:
 Only return the JSON, nothing else.
 """
         
-        response = gemini_client.models.generate_content(
+        response = await gemini_client.aio.models.generate_content(
             model=model,
             contents=prompt
         )
@@ -1,9 +1,37 @@
+import time as _time
 from datetime import date, datetime, time
 from decimal import Decimal
 from enum import Enum
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Tuple, Union
 from uuid import UUID
 
+# (epoch second, formatted "YYYY-MM-DDTHH:MM:SS") for utc_isoformat
+_utc_second_cache: Tuple[int, str] = (-1, "")
+
+
+def utc_isoformat() -> str:
+    """Return the current UTC time as a naive ISO 8601 string.
+    
+    Same output as ``datetime.utcnow().isoformat()``, including leaving out
+    the fraction when it is zero, but the date/time prefix is formatted only
+    once per second, which matters on paths that stamp dozens of messages
+    a second.
+    
+    Returns:
+        Timestamp string such as ``2025-01-01T12:00:00.123456``
+    """
+    global _utc_second_cache
+    
+    second, nanoseconds = divmod(_time.time_ns(), 1_000_000_000)
+    cached_second, prefix = _utc_second_cache
+    if second != cached_second:
+        prefix = _time.strftime("%Y-%m-%dT%H:%M:%S", _time.gmtime(second))
+        _utc_second_cache = (second, prefix)
+    microseconds = nanoseconds // 1_000
+    if not microseconds:
+        return prefix
+    return f"{prefix}.{microseconds:06d}"
+
 
 def sanitize_for_json(data: Any) -> Any:
     """Recursively sanitize data for JSON serialization.
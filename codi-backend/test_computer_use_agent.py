@@ -29,7 +29,7 @@ async def main():
     print(f"✅ API key found (length: {len(api_key)})")
     
     # Import and test
-    from app.agent.computer_use_agent import ComputerUseAgent
+    from app.agent.computer_use_agent import ComputerUseAgent, shutdown_playwright
     
     print("\nInitializing Computer Use Agent (headless=False for visibility)...")
     
@@ -62,6 +62,8 @@ async def main():
         return 1
     finally:
         await agent.close()
+        # Agents share one Playwright driver; stop it before exiting
+        await shutdown_playwright()
 
 
 if __name__ == "__main__":
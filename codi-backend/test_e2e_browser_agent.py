@@ -19,6 +19,7 @@ from dotenv import load_dotenv
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.agent.browser_agent import run_browser_agent
+from app.agent.computer_use_agent import shutdown_playwright
 from app.utils.logging import get_logger
 
 # Configure logging
@@ -63,6 +64,9 @@ async def main():
         import traceback
         logger.error(traceback.format_exc())
         return 1
+    finally:
+        # Agents share one Playwright driver; stop it before exiting
+        await shutdown_playwright()
 
 if __name__ == "__main__":
     exit_code = asyncio.run(main())
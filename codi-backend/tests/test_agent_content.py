@@ -0,0 +1,38 @@
+"""Unit tests for coding agent content helpers."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.agent.agent import LOG_PREVIEW_CHARS, _preview_content
+
+pytestmark = pytest.mark.unit
+
+
+def test_preview_truncates_string_content():
+    assert _preview_content("x" * (LOG_PREVIEW_CHARS + 50)) == "x" * LOG_PREVIEW_CHARS
+
+
+def test_preview_skips_leading_non_text_blocks():
+    content = [
+        {"type": "image_url", "image_url": "data:image/png;base64,AAAA"},
+        {"type": "text", "text": ""},
+        {"type": "text", "text": "Done"},
+    ]
+
+    assert _preview_content(content) == "Done"
+
+
+def test_preview_joins_and_truncates_text_blocks():
+    content = [{"type": "text", "text": "a" * LOG_PREVIEW_CHARS}, {"type": "text", "text": "b"}]
+
+    assert _preview_content(content) == "a" * LOG_PREVIEW_CHARS
+
+
+def test_preview_of_missing_content_is_empty():
+    assert _preview_content(None) == ""
+    assert _preview_content([]) == ""
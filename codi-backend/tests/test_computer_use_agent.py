@@ -0,0 +1,113 @@
+"""Unit tests for Computer Use agent streaming and input helpers."""
+
+import sys
+from pathlib import Path
+
+import pytest
+from google.genai import types
+from google.genai.types import Part
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.agent.computer_use_agent import ComputerUseAgent, _append_streamed_part
+
+pytestmark = pytest.mark.unit
+
+
+class RecordingInput:
+    """Stand-in for page.mouse / page.keyboard that records calls."""
+
+    def __init__(self, log: list, name: str) -> None:
+        self._log = log
+        self._name = name
+
+    def __getattr__(self, method: str):
+        async def record(*args, **kwargs):
+            self._log.append((f"{self._name}.{method}", args))
+
+        return record
+
+
+class FakePage:
+    """Minimal page exposing recorded mouse and keyboard input."""
+
+    def __init__(self) -> None:
+        self.log: list = []
+        self.mouse = RecordingInput(self.log, "mouse")
+        self.keyboard = RecordingInput(self.log, "keyboard")
+
+
+def mouse_move(x: int, y: int) -> dict:
+    return {"type": "input_mouse", "eventType": "mouseMoved", "x": x, "y": y}
+
+
+def make_agent() -> ComputerUseAgent:
+    agent = ComputerUseAgent(project_id=1, user_id=1)
+    agent._page = FakePage()
+    return agent
+
+
+def test_streamed_text_fragments_are_merged():
+    parts = []
+    _append_streamed_part(parts, Part(text="Hello, "))
+    _append_streamed_part(parts, Part(text="world"))
+
+    assert len(parts) == 1
+    assert parts[0].text == "Hello, world"
+
+
+def test_streamed_function_call_is_kept_separate():
+    parts = []
+    _append_streamed_part(parts, Part(text="Clicking"))
+    _append_streamed_part(parts, Part(function_call=types.FunctionCall(name="click_at", args={})))
+    _append_streamed_part(parts, Part(text="done"))
+
+    assert [part.text for part in parts] == ["Clicking", None, "done"]
+
+
+def test_streamed_thought_is_not_merged_into_text():
+    parts = []
+    _append_streamed_part(parts, Part(text="thinking", thought=True))
+    _append_streamed_part(parts, Part(text="answer"))
+
+    assert [part.text for part in parts] == ["thinking", "answer"]
+
+
+def test_streamed_thought_signature_is_kept_separate():
+    parts = []
+    _append_streamed_part(parts, Part(text="first"))
+    _append_streamed_part(parts, Part(text="second", thought_signature=b"sig"))
+
+    assert len(parts) == 2
+    assert parts[1].thought_signature == b"sig"
+
+
+async def test_consecutive_mouse_moves_collapse_to_last():
+    agent = make_agent()
+    await agent.handle_user_interaction({
+        "payload": [
+            mouse_move(1, 1),
+            mouse_move(2, 2),
+            mouse_move(3, 3),
+            {"type": "input_mouse", "eventType": "mousePressed", "x": 3, "y": 3},
+            mouse_move(4, 4),
+            mouse_move(5, 5),
+        ]
+    })
+
+    assert agent._page.log == [
+        ("mouse.move", (3, 3)),
+        ("mouse.move", (3, 3)),
+        ("mouse.down", ()),
+        ("mouse.move", (5, 5)),
+    ]
+
+
+async def test_single_interaction_is_applied():
+    agent = make_agent()
+    await agent.handle_user_interaction({
+        "payload": {"type": "input_keyboard", "eventType": "type", "text": "hi"}
+    })
+
+    assert agent._page.log == [("keyboard.type", ("hi",))]
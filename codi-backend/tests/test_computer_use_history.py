@@ -0,0 +1,154 @@
+"""Unit tests for Computer Use agent history management."""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+from google.genai.types import Content, Part
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.agent.computer_use_agent import (
+    OMITTED_SCREENSHOT_TEXT,
+    UNCHANGED_SCREENSHOT_TEXT,
+    ComputerUseAgent,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def make_agent(**kwargs) -> ComputerUseAgent:
+    """Create an agent with a fake page and the initial task turn."""
+    agent = ComputerUseAgent(project_id=1, user_id=1, **kwargs)
+    agent._page = SimpleNamespace(url="https://example.com")
+    agent._contents = [
+        Content(
+            role="user",
+            parts=[
+                Part(text="task"),
+                Part(inline_data=types.Blob(mime_type="image/png", data=b"initial")),
+            ],
+        )
+    ]
+    return agent
+
+
+def add_turn(agent: ComputerUseAgent, screenshot: bytes) -> None:
+    """Append a model call and its function response, then prepare the
+    history for the next request as the agent loop does."""
+    agent._contents.append(
+        Content(
+            role="model",
+            parts=[Part(function_call=types.FunctionCall(name="click_at", args={"x": 1, "y": 1}))],
+        )
+    )
+    responses = agent._get_function_responses([("click_at", {})], screenshot)
+    agent._contents.append(
+        Content(role="user", parts=[Part(function_response=fr) for fr in responses])
+    )
+    agent._prepare_history()
+
+
+def response_images(content: Content) -> list:
+    """Return the screenshot bytes carried by a function response turn."""
+    return [
+        response_part.inline_data.data
+        for part in content.parts
+        for response_part in part.function_response.parts or []
+    ]
+
+
+def test_identical_screenshot_is_not_resent():
+    agent = make_agent()
+    add_turn(agent, b"page")
+    add_turn(agent, b"page")
+
+    assert response_images(agent._contents[-3]) == [b"page"]
+    assert response_images(agent._contents[-1]) == []
+    response = agent._contents[-1].parts[0].function_response.response
+    assert response["screenshot"] == UNCHANGED_SCREENSHOT_TEXT
+
+
+def test_identical_initial_screenshot_is_not_resent():
+    agent = make_agent()
+    add_turn(agent, b"initial")
+
+    assert response_images(agent._contents[-1]) == []
+
+
+def test_changed_screenshot_is_sent():
+    agent = make_agent()
+    add_turn(agent, b"before")
+    add_turn(agent, b"after")
+
+    assert response_images(agent._contents[-1]) == [b"after"]
+
+
+def test_prune_keeps_recent_screenshots():
+    agent = make_agent(max_recent_screenshots=2)
+    for screenshot in (b"one", b"two", b"three"):
+        add_turn(agent, screenshot)
+
+    agent._prune_old_screenshots()
+
+    assert agent._contents[0].parts[1].text == OMITTED_SCREENSHOT_TEXT
+    assert response_images(agent._contents[2]) == []
+    assert agent._contents[2].parts[0].function_response.response["screenshot"] == (
+        OMITTED_SCREENSHOT_TEXT
+    )
+    assert response_images(agent._contents[4]) == [b"two"]
+    assert response_images(agent._contents[6]) == [b"three"]
+
+
+def test_screenshot_is_kept_when_prune_drops_the_earlier_copy():
+    agent = make_agent(max_recent_screenshots=1)
+    add_turn(agent, b"page")
+    add_turn(agent, b"page")
+
+    # Only one image fits the window, so the earlier copy is the one omitted
+    assert response_images(agent._contents[2]) == []
+    assert response_images(agent._contents[4]) == [b"page"]
+
+
+def test_trim_keeps_task_turn_and_starts_on_model_turn():
+    agent = make_agent(max_history_turns=4)
+    for screenshot in (b"one", b"two", b"three", b"four"):
+        add_turn(agent, screenshot)
+
+    assert len(agent._contents) == 5
+    assert agent._contents[0].parts[0].text == "task"
+    assert agent._contents[1].role == "model"
+    assert response_images(agent._contents[-1]) == [b"four"]
+
+
+def test_trim_does_not_orphan_function_responses():
+    agent = make_agent(max_history_turns=3)
+    for screenshot in (b"one", b"two", b"three"):
+        add_turn(agent, screenshot)
+
+    # Cutting to three turns would start on a function response, so the
+    # trim advances to the next model turn instead
+    assert [content.role for content in agent._contents] == ["user", "model", "user"]
+
+
+def test_screenshot_is_kept_when_trim_drops_the_earlier_copy():
+    agent = make_agent(max_history_turns=2)
+    add_turn(agent, b"page")
+    add_turn(agent, b"page")
+
+    # The turn holding the first copy was trimmed before the comparison,
+    # so the current screenshot is sent rather than marked unchanged
+    assert [content.role for content in agent._contents] == ["user", "model", "user"]
+    assert response_images(agent._contents[-1]) == [b"page"]
+
+
+def test_unchanged_turns_never_outlive_their_image():
+    agent = make_agent(max_history_turns=4)
+    for _ in range(10):
+        add_turn(agent, b"page")
+
+        # Whatever was trimmed, the current screen is in the history
+        assert agent._latest_context_screenshot() == b"page"
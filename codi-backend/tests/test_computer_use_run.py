@@ -0,0 +1,191 @@
+"""Unit tests for the Computer Use agent loop with a fake model stream."""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+from google.genai.types import Content, Part
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import app.agent.computer_use_agent as computer_use_agent
+from app.agent.computer_use_agent import ComputerUseAgent
+
+pytestmark = pytest.mark.unit
+
+# Marker in a scripted turn: the stream raises at this point
+FAIL = object()
+
+
+class FakeStreamModels:
+    """Replays scripted turns from generate_content_stream()."""
+
+    def __init__(self, turns: list) -> None:
+        self.turns = list(turns)
+        self.requests: list = []
+
+    async def generate_content_stream(self, model, contents, config):
+        # Snapshot the turns sent; the agent mutates its history afterwards
+        self.requests.append([content.model_copy(deep=True) for content in contents])
+        chunks = self.turns.pop(0)
+
+        async def stream():
+            for chunk in chunks:
+                if chunk is FAIL:
+                    raise RuntimeError("stream broke")
+                yield types.GenerateContentResponse(
+                    candidates=[types.Candidate(content=Content(role="model", parts=[chunk]))]
+                )
+
+        return stream()
+
+
+class RecordingMouse:
+    """Stand-in for page.mouse that records calls."""
+
+    def __init__(self, log: list) -> None:
+        self._log = log
+
+    async def move(self, x, y):
+        self._log.append(("mouse.move", x, y))
+
+
+class FakePage:
+    """Page whose screenshot changes after every mouse action."""
+
+    def __init__(self) -> None:
+        self.url = "https://example.com"
+        self.log: list = []
+        self.mouse = RecordingMouse(self.log)
+
+    async def screenshot(self, **kwargs):
+        return f"screen-{len(self.log)}".encode()
+
+
+class FakeConnectionManager:
+    """Swallows broadcasts."""
+
+    def get_connection_count(self, project_id):
+        return 0
+
+    async def broadcast_to_project(self, project_id, message):
+        pass
+
+
+def hover(x: int) -> Part:
+    return Part(function_call=types.FunctionCall(name="hover_at", args={"x": x, "y": 0}))
+
+
+def note_texts(content: Content) -> list:
+    return [part.text for part in content.parts if part.text]
+
+
+def note_images(content: Content) -> list:
+    return [part.inline_data.data for part in content.parts if part.inline_data]
+
+
+@pytest.fixture
+def run_agent(monkeypatch):
+    """Run an agent against scripted model turns; returns (agent, models)."""
+
+    async def run(turns: list):
+        models = FakeStreamModels(turns)
+        client = SimpleNamespace(aio=SimpleNamespace(models=models))
+        monkeypatch.setattr(computer_use_agent, "_gemini_client", client)
+        monkeypatch.setattr(computer_use_agent, "INPUT_SETTLE_DELAY", 0)
+
+        agent = ComputerUseAgent(project_id=1, user_id=1, max_iterations=5)
+        agent._connection_manager = FakeConnectionManager()
+
+        async def init_browser(initial_url):
+            agent._page = FakePage()
+
+        async def no_streaming():
+            pass
+
+        agent._init_browser = init_browser
+        agent._start_streaming = no_streaming
+        response = await agent.run("do it")
+        return agent, models, response
+
+    return run
+
+
+async def test_function_calls_run_and_get_responses(run_agent):
+    agent, models, response = await run_agent([
+        [Part(text="Hovering"), hover(100), hover(200)],
+        [Part(text="Done")],
+    ])
+
+    assert response == "Done"
+    assert agent._page.log == [("mouse.move", 144, 0), ("mouse.move", 288, 0)]
+    model_turn, responses = models.requests[1][1:]
+    assert [part.text for part in model_turn.parts] == ["Hovering", None, None]
+    assert [part.function_response.name for part in responses.parts] == ["hover_at", "hover_at"]
+
+
+async def test_failure_mid_stream_reports_actions_already_run(run_agent):
+    agent, models, response = await run_agent([
+        [hover(100), FAIL],
+        [Part(text="Done")],
+    ])
+
+    assert response == "Done"
+    # The call that streamed in before the failure still ran
+    assert agent._page.log == [("mouse.move", 144, 0)]
+
+    # The partial model turn was dropped in favour of a recovery note
+    history = models.requests[1]
+    assert [content.role for content in history] == ["user", "user"]
+    note = history[-1]
+    assert "These actions had already run: hover_at." in note_texts(note)[0]
+    assert note_images(note) == [b"screen-1"]
+
+
+async def test_second_failure_keeps_actions_from_the_first(run_agent):
+    agent, models, response = await run_agent([
+        [hover(100), FAIL],
+        [hover(200), FAIL],
+        [FAIL],
+        [Part(text="Done")],
+    ])
+
+    assert response == "Done"
+    assert len(agent._page.log) == 2
+
+    # Each note replaces the last and still names every action run
+    for request in models.requests[1:]:
+        assert [content.role for content in request] == ["user", "user"]
+    notes = [request[-1] for request in models.requests[1:]]
+    assert "These actions had already run: hover_at." in note_texts(notes[0])[0]
+    assert "These actions had already run: hover_at, hover_at." in note_texts(notes[1])[0]
+    assert "These actions had already run: hover_at, hover_at." in note_texts(notes[2])[0]
+    assert note_images(notes[2]) == [b"screen-2"]
+
+
+async def test_failure_without_actions_sends_plain_note(run_agent):
+    agent, models, response = await run_agent([
+        [FAIL],
+        [Part(text="Done")],
+    ])
+
+    assert response == "Done"
+    note = models.requests[1][-1]
+    assert note_texts(note) == ["Error occurred: stream broke. Please try a different approach."]
+    assert note_images(note) == []
+
+
+async def test_success_resets_the_failed_actions(run_agent):
+    agent, models, response = await run_agent([
+        [hover(100), FAIL],
+        [hover(200)],
+        [FAIL],
+        [Part(text="Done")],
+    ])
+
+    assert response == "Done"
+    note = models.requests[3][-1]
+    assert note_texts(note) == ["Error occurred: stream broke. Please try a different approach."]
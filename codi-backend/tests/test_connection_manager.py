@@ -0,0 +1,48 @@
+"""Unit tests for WebSocket message encoding."""
+
+import struct
+import sys
+from pathlib import Path
+
+import orjson
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api.websocket.connection_manager import encode_binary_message
+
+pytestmark = pytest.mark.unit
+
+
+def decode_binary_message(message: bytes) -> tuple:
+    """Split a binary message the way the frontend does."""
+    (header_length,) = struct.unpack_from("<I", message)
+    header = orjson.loads(message[4:4 + header_length])
+    return header, message[4 + header_length:]
+
+
+def test_binary_message_round_trips():
+    header = {"type": "browser_frame", "format": "jpeg", "deviceWidth": 1440}
+    data = b"\xff\xd8\xff" + bytes(range(256))
+
+    assert decode_binary_message(encode_binary_message(header, data)) == (header, data)
+
+
+def test_binary_message_header_length_is_little_endian():
+    message = encode_binary_message({"type": "browser_frame"}, b"")
+
+    assert message[:4] == len(b'{"type":"browser_frame"}').to_bytes(4, "little")
+
+
+def test_binary_message_header_allows_non_string_keys():
+    header, data = decode_binary_message(encode_binary_message({"type": "x", 1: "one"}, b"raw"))
+
+    assert header == {"type": "x", "1": "one"}
+    assert data == b"raw"
+
+
+def test_binary_message_header_is_utf8():
+    header, _ = decode_binary_message(encode_binary_message({"title": "Café ✓"}, b""))
+
+    assert header == {"title": "Café ✓"}
@@ -0,0 +1,56 @@
+"""Unit tests for serialization helpers."""
+
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils import serialization
+from app.utils.serialization import utc_isoformat
+
+pytestmark = pytest.mark.unit
+
+
+def expected_isoformat(nanoseconds: int) -> str:
+    """Format a timestamp the way datetime.utcnow().isoformat() does."""
+    seconds, remainder = divmod(nanoseconds, 1_000_000_000)
+    moment = datetime.fromtimestamp(seconds, tz=timezone.utc).replace(
+        microsecond=remainder // 1_000, tzinfo=None
+    )
+    return moment.isoformat()
+
+
+@pytest.mark.parametrize(
+    "nanoseconds",
+    [
+        1_735_732_800_123_456_789,
+        1_735_732_800_000_001_000,
+        1_735_732_800_000_000_000,
+        1_735_732_800_000_000_999,
+    ],
+)
+def test_utc_isoformat_matches_datetime_isoformat(monkeypatch, nanoseconds):
+    monkeypatch.setattr(serialization, "_utc_second_cache", (-1, ""))
+    monkeypatch.setattr(time, "time_ns", lambda: nanoseconds)
+
+    assert utc_isoformat() == expected_isoformat(nanoseconds)
+
+
+def test_utc_isoformat_reformats_prefix_on_new_second(monkeypatch):
+    monkeypatch.setattr(serialization, "_utc_second_cache", (-1, ""))
+    monkeypatch.setattr(time, "time_ns", lambda: 1_735_732_799_999_999_000)
+    assert utc_isoformat() == "2025-01-01T11:59:59.999999"
+
+    monkeypatch.setattr(time, "time_ns", lambda: 1_735_732_800_500_000_000)
+    assert utc_isoformat() == "2025-01-01T12:00:00.500000"
+
+
+def test_utc_isoformat_is_current_time():
+    stamp = datetime.fromisoformat(utc_isoformat())
+
+    assert abs((datetime.utcnow() - stamp).total_seconds()) < 1
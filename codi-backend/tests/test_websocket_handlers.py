@@ -0,0 +1,59 @@
+"""Unit tests for WebSocket handler background tasks."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api.websocket import handlers
+
+pytestmark = pytest.mark.unit
+
+
+async def test_session_marker_writes_land_in_order():
+    log = []
+
+    async def slow_set():
+        await asyncio.sleep(0.05)
+        log.append("set")
+
+    async def delete():
+        log.append("delete")
+
+    handlers._write_session_marker(1, slow_set())
+    last = handlers._write_session_marker(1, delete())
+    await last
+
+    assert log == ["set", "delete"]
+    assert 1 not in handlers._session_marker_tasks
+
+
+async def test_session_marker_writes_for_other_projects_do_not_wait():
+    log = []
+
+    async def slow_set():
+        await asyncio.sleep(0.05)
+        log.append("set 1")
+
+    async def delete():
+        log.append("delete 2")
+
+    first = handlers._write_session_marker(1, slow_set())
+    await handlers._write_session_marker(2, delete())
+    await first
+
+    assert log == ["delete 2", "set 1"]
+
+
+async def test_drain_background_tasks_is_bounded(monkeypatch):
+    monkeypatch.setattr(handlers, "BACKGROUND_DRAIN_TIMEOUT", 0.05)
+    task = handlers._spawn_background(asyncio.sleep(10))
+
+    await handlers.drain_background_tasks()
+    await asyncio.sleep(0)
+
+    assert task.cancelled()
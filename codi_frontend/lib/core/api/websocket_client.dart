@@ -4,6 +4,7 @@ library;
 import 'dart:async';
 import 'dart:convert';
 import 'dart:math';
+import 'dart:typed_data';
 
 import 'package:flutter/material.dart';
 import 'package:get/get.dart';
@@ -29,6 +30,7 @@ class WebSocketClient extends GetxService {
   /// Current project ID
   String? _currentProjectId;
 
+  final _random = Random();
   Timer? _reconnectTimer;
   Timer? _heartbeatTimer;
   int _reconnectAttempts = 0;
@@ -93,7 +95,9 @@ class WebSocketClient extends GetxService {
 
   void _onMessage(dynamic message) {
     try {
-      final data = jsonDecode(message as String) as Map<String, dynamic>;
+      final data = message is List<int>
+          ? _decodeBinaryMessage(message)
+          : jsonDecode(message as String) as Map<String, dynamic>;
       AppLogger.debug('WebSocket message: ${data['type']}');
 
       // Handle pong messages internally
@@ -108,6 +112,22 @@ class WebSocketClient extends GetxService {
     }
   }
 
+  /// Decode a binary message (used for browser frames).
+  ///
+  /// Layout: 4-byte little-endian header length, UTF-8 JSON header, then the
+  /// raw payload, which is exposed to listeners under the 'bytes' key.
+  Map<String, dynamic> _decodeBinaryMessage(List<int> message) {
+    final bytes =
+        message is Uint8List ? message : Uint8List.fromList(message);
+    final headerLength =
+        ByteData.sublistView(bytes, 0, 4).getUint32(0, Endian.little);
+    final data = jsonDecode(
+      utf8.decode(Uint8List.sublistView(bytes, 4, 4 + headerLength)),
+    ) as Map<String, dynamic>;
+    data['bytes'] = Uint8List.sublistView(bytes, 4 + headerLength);
+    return data;
+  }
+
   void _onError(dynamic error) {
     AppLogger.error('WebSocket error', error: error);
     _attemptReconnect();
@@ -147,8 +167,11 @@ class WebSocketClient extends GetxService {
     }
 
     _reconnectAttempts++;
+    // Jittered exponential backoff so clients don't reconnect in lockstep
+    // after a backend restart
+    final maxDelayMs = min(30, pow(2, _reconnectAttempts).toInt()) * 1000;
     final delay = Duration(
-      seconds: min(30, pow(2, _reconnectAttempts).toInt()),
+      milliseconds: 500 + _random.nextInt(max(1, maxDelayMs - 500)),
     );
 
     AppLogger.info(
@@ -161,9 +161,35 @@ class AgentChatController extends GetxController {
       return;
     }
 
+    // Streamed response text is shown provisionally while it's generated
+    if (messageType == 'agent_response_delta') {
+      _handleResponseDelta(data);
+      return;
+    }
+
+    // Browser agent sends one tool_batch per turn; replay it as the
+    // individual tool_execution/tool_result messages it contains
+    if (messageType == 'tool_batch') {
+      _handleToolBatch(data);
+      return;
+    }
+
     // Parse message
     final message = AgentMessage.fromWebSocket(data);
 
+    // The final response replaces the provisional text, and narration that
+    // preceded tool calls is dropped, matching the non-streamed display; a
+    // terminal status ends a turn that never produced a final response
+    if (message.type == MessageType.agentResponse ||
+        message.type == MessageType.conversationalResponse ||
+        (message.type == MessageType.agentStatus &&
+            (message.status == 'completed' ||
+                message.status == 'failed' ||
+                message.status == 'error' ||
+                message.status == 'stopped'))) {
+      _clearStreamingResponse();
+    }
+
     // Update controller states based on message type
     switch (message.type) {
       case MessageType.taskSubmitted:
@@ -420,6 +446,62 @@ class AgentChatController extends GetxController {
     }
   }
 
+  /// Append a streamed text delta to the provisional response message
+  void _handleResponseDelta(Map<String, dynamic> data) {
+    final delta = data['text'] as String? ?? '';
+    if (delta.isEmpty) return;
+
+    final last = messages.isNotEmpty ? messages.last : null;
+    if (last != null &&
+        last.type == MessageType.agentResponse &&
+        last.status == 'streaming') {
+      messages[messages.length - 1] = AgentMessage(
+        text: last.text + delta,
+        timestamp: last.timestamp,
+        type: MessageType.agentResponse,
+        agent: last.agent,
+        status: 'streaming',
+      );
+    } else {
+      addMessage(AgentMessage(
+        text: delta,
+        timestamp: DateTime.now(),
+        type: MessageType.agentResponse,
+        agent: data['agent'] as String?,
+        status: 'streaming',
+      ));
+    }
+  }
+
+  /// Remove the provisional streamed response, if one is showing
+  void _clearStreamingResponse() {
+    messages.removeWhere((m) =>
+        m.type == MessageType.agentResponse && m.status == 'streaming');
+  }
+
+  /// Expand a batched tool event into execution/result messages, in order
+  void _handleToolBatch(Map<String, dynamic> data) {
+    final executions = (data['executions'] as List?) ?? const [];
+    final results = (data['results'] as List?) ?? const [];
+
+    for (var i = 0; i < executions.length; i++) {
+      _handleMessage({
+        ...Map<String, dynamic>.from(executions[i] as Map),
+        'type': 'tool_execution',
+        'agent': data['agent'],
+        'timestamp': data['timestamp'],
+      });
+      if (i < results.length) {
+        _handleMessage({
+          ...Map<String, dynamic>.from(results[i] as Map),
+          'type': 'tool_result',
+          'agent': data['agent'],
+          'timestamp': data['timestamp'],
+        });
+      }
+    }
+  }
+
   /// Add message to list
   void addMessage(AgentMessage message) {
     // Auto-collapse previous tool execution messages
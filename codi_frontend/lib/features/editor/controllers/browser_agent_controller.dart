@@ -51,6 +51,11 @@ class BrowserAgentController extends GetxController {
   Uint8List? _pendingFrame;
   static const _frameUpdateInterval = Duration(milliseconds: 33); // ~30 FPS cap
 
+  // Interaction batching - pointer moves are held until the next frame tick
+  // so a burst of them goes out as a single WebSocket message
+  final List<Map<String, dynamic>> _pendingInteractions = [];
+  static const _maxBatchedInteractions = 32;
+
   @override
   void onInit() {
     super.onInit();
@@ -66,6 +71,33 @@ class BrowserAgentController extends GetxController {
         currentFrame.value = _pendingFrame;
         _pendingFrame = null;
       }
+      _flushInteractions();
+    });
+  }
+
+  /// Queue an interaction event for the browser.
+  /// Events that must not be delayed (clicks, keys) flush the queue
+  /// immediately, carrying any pending pointer moves with them in order.
+  void _queueInteraction(Map<String, dynamic> payload, {bool flush = true}) {
+    _pendingInteractions.add(payload);
+    if (flush || _pendingInteractions.length >= _maxBatchedInteractions) {
+      _flushInteractions();
+    }
+  }
+
+  /// Send all pending interaction events as one message
+  void _flushInteractions() {
+    if (_pendingInteractions.isEmpty) return;
+
+    final payload = _pendingInteractions.length == 1
+        ? _pendingInteractions.first
+        : List<Map<String, dynamic>>.of(_pendingInteractions);
+    _pendingInteractions.clear();
+
+    _webSocketClient.sendMessage({
+      'type': 'user_interaction',
+      'agent': 'browser',
+      'payload': payload,
     });
   }
 
@@ -100,12 +132,14 @@ class BrowserAgentController extends GetxController {
     if (!isSessionActive.value) return;
 
     try {
+      // Local sessions send raw JPEG bytes in a binary message; the Redis
+      // fallback path still sends base64 in the 'image' field
+      final rawBytes = data['bytes'] as Uint8List?;
       final imageB64 = data['image'] as String?;
-      if (imageB64 != null) {
-        lastFrameSize.value = imageB64.length;
-        print('BrowserFrame: received ${imageB64.length} chars');
-
-        final bytes = base64Decode(imageB64);
+      if (rawBytes != null || imageB64 != null) {
+        final bytes = rawBytes ?? base64Decode(imageB64!);
+        lastFrameSize.value = bytes.length;
+        print('BrowserFrame: received ${bytes.length} bytes');
 
         // Store frame for next update cycle (throttled)
         _pendingFrame = bytes;
@@ -200,18 +234,14 @@ class BrowserAgentController extends GetxController {
       scaledY = scaledY.clamp(0, browserHeight.toDouble());
     }
 
-    _webSocketClient.sendMessage({
-      'type': 'user_interaction',
-      'agent': 'browser',
-      'payload': {
-        'type': 'input_mouse',
-        'eventType': eventType,
-        'x': scaledX.toInt(),
-        'y': scaledY.toInt(),
-        'button': button,
-        'clickCount': clickCount,
-      }
-    });
+    _queueInteraction({
+      'type': 'input_mouse',
+      'eventType': eventType,
+      'x': scaledX.toInt(),
+      'y': scaledY.toInt(),
+      'button': button,
+      'clickCount': clickCount,
+    }, flush: eventType != 'mouseMoved');
   }
 
   /// Send keyboard event to browser
@@ -222,15 +252,11 @@ class BrowserAgentController extends GetxController {
   }) {
     if (!isSessionActive.value) return;
 
-    _webSocketClient.sendMessage({
-      'type': 'user_interaction',
-      'agent': 'browser',
-      'payload': {
-        'type': 'input_keyboard',
-        'eventType': eventType,
-        'key': key,
-        'code': code,
-      }
+    _queueInteraction({
+      'type': 'input_keyboard',
+      'eventType': eventType,
+      'key': key,
+      'code': code,
     });
   }
 
@@ -379,6 +405,7 @@ class BrowserAgentController extends GetxController {
 
     currentFrame.value = null;
     _pendingFrame = null;
+    _pendingInteractions.clear();
     isSessionActive.value = false;
     isInteractiveMode.value = false;
     isLoading.value = false;
@@ -419,14 +446,10 @@ class BrowserAgentController extends GetxController {
   void sendTextInput(String text) {
     if (!isSessionActive.value || text.isEmpty) return;
 
-    _webSocketClient.sendMessage({
-      'type': 'user_interaction',
-      'agent': 'browser',
-      'payload': {
-        'type': 'input_keyboard',
-        'eventType': 'type',
-        'text': text,
-      }
+    _queueInteraction({
+      'type': 'input_keyboard',
+      'eventType': 'type',
+      'text': text,
     });
   }
 
@@ -436,14 +459,10 @@ class BrowserAgentController extends GetxController {
 
     AppLogger.debug('Sending special key: $key');
 
-    _webSocketClient.sendMessage({
-      'type': 'user_interaction',
-      'agent': 'browser',
-      'payload': {
-        'type': 'input_keyboard',
-        'eventType': 'press',
-        'key': key,
-      }
+    _queueInteraction({
+      'type': 'input_keyboard',
+      'eventType': 'press',
+      'key': key,
     });
   }
 